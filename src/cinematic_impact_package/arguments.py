@@ -0,0 +1,54 @@
+"""
+This module provides command line arguments shared by the programs of the package (the demonstration
+program in demo.py and the SQLite ingest command in sqlstore.py).
+"""
+
+import argparse
+
+def add_data_arguments(parser: argparse.ArgumentParser, geo_required=True):
+    """
+    Adds arguments with paths to the IMDb and geopolitical data files to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser.
+        geo_required (bool, optional): Whether paths to the geopolitical data are required.
+    """
+    parser.add_argument(
+        "--basics",
+        type=str,
+        required=True,
+        help="Path to the TSV file including cols = ['tconst', 'genres', 'titleType', 'startYear']."
+    )
+    parser.add_argument(
+        "--ratings",
+        type=str,
+        required=True,
+        help="Path to the TSV file including cols = ['tconst', 'numVotes', 'averageRating]."
+    )
+    parser.add_argument(
+        "--akas",
+        type=str,
+        required=True,
+        help="Path to the TSV file including cols = ['titleId','title','region','isOriginalTitle']."
+        )
+    parser.add_argument(
+        "--gdp",
+        type=str,
+        required=geo_required,
+        help="Path to the CSV file with GDP data with column \"Country Code\" \
+        with ISO 3166-1 and columns representing years."
+    )
+    parser.add_argument(
+        "--pop",
+        type=str,
+        required=geo_required,
+        help="Path to the CSV file with population data with column \"Country Code\" \
+        with ISO 3166-1 and columns representing years."
+    )
+    parser.add_argument(
+        "--pc",
+        type=str,
+        required=geo_required,
+        help="Path to the CSV file with GDP per capita data with column \"Country Code\" \
+            with ISO 3166-1 and columns representing years."
+        )
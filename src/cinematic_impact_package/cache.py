@@ -0,0 +1,208 @@
+"""
+This module provides disk-backed memoization of the analysis functions from lib.py. Results are
+keyed on the fingerprints of the input files together with every parameter of a call, stored as
+compressed pickles and evicted in least recently used order when the cache exceeds its size.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import zlib
+from typing import Any, Callable
+import pandas as pd
+from cinematic_impact_package import lib
+from cinematic_impact_package.lib import DEFAULT_OUTPUT_PATHS, file_fingerprint
+
+# Version of the stored results, bumping it invalidates all cached results
+CACHE_VERSION = 1
+
+# Parameters which do not change the result of a function and are not a part of the key
+IGNORED_PARAMS = {'output_path', 'correlation_path'}
+
+# Module constants of lib used by the analyses, their current values are a part of every key
+RESULT_CONSTANTS = ['FLOP_TH', 'MASTERPIECE_TH', 'VOTE_TH']
+
+class ResultCache:
+    """
+    A size-bounded on-disk cache of analysis results.
+
+    Methods:
+        memoize(func): Returns a memoized version of a function.
+        get(key): Returns a stored result or None.
+        put(key, value): Stores a result and evicts least recently used ones.
+        clear(): Removes all stored results.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 2**30):
+        """
+        Initializes the ResultCache.
+
+        Args:
+            cache_dir (str): Directory in which results are stored, created if needed.
+            max_bytes (int, optional): Maximal total size of stored results in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def memoize(self, func: Callable) -> Callable:
+        """
+        Returns a memoized version of a function.
+
+        Data arguments (e.g. IMDbData) are identified by their fingerprint() and string arguments
+        naming existing files by the file's path, size and modification time, so a cached result
+        is returned without loading any data. On a cache hit the result is written to output_path,
+        or to the default path of the function (see lib.DEFAULT_OUTPUT_PATHS), as when it is computed.
+        Calls with arguments which cannot be identified are not cached.
+
+        Args:
+            func (Callable): The function to memoize.
+
+        Returns:
+            Callable: The memoized function.
+        """
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                key = self.make_key(func, bound.arguments)
+            except (TypeError, OSError):
+                return func(*args, **kwargs)
+
+            result = self.get(key)
+            if result is None:
+                result = func(*args, **kwargs)
+                self.put(key, result)
+            else:
+                _write_output(func, bound.arguments, result)
+            return result
+        return wrapper
+
+    def make_key(self, func: Callable, arguments: dict[str, Any]) -> str:
+        """
+        Returns the key of a function call.
+
+        Args:
+            func (Callable): The called function.
+            arguments (dict[str, Any]): All arguments of the call, including defaults and **kwargs.
+
+        Returns:
+            str: The key of the call.
+        """
+        parts = [CACHE_VERSION, tuple(getattr(lib, name) for name in RESULT_CONSTANTS), func.__module__,
+                 func.__qualname__]
+        for name, value in arguments.items():
+            if name not in IGNORED_PARAMS:
+                parts.append((name, _key_part(value)))
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """
+        Returns a stored result and marks it as recently used.
+
+        Args:
+            key (str): The key of the result.
+
+        Returns:
+            Any: The stored result or None when it is missing.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return pickle.loads(zlib.decompress(data))
+
+    def put(self, key: str, value: Any):
+        """
+        Stores a result and evicts least recently used results exceeding the cache size.
+
+        Args:
+            key (str): The key of the result.
+            value (Any): The result, it has to be picklable.
+        """
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def clear(self):
+        """
+        Removes all stored results.
+        """
+        for entry in self._entries():
+            _remove(entry.path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl.z")
+
+    def _entries(self) -> list[os.DirEntry]:
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.pkl.z')]
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path))
+                except FileNotFoundError:
+                    pass
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                _remove(path)
+                total -= size
+
+
+# Helper function converting an argument into a hashable and reproducible part of a key
+def _key_part(value: Any):
+    if hasattr(value, 'fingerprint'):
+        return ('data', value.fingerprint())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashed = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return ('frame', columns, hashlib.sha256(hashed.tobytes()).hexdigest())
+    if isinstance(value, str) and os.path.isfile(value):
+        return ('file', file_fingerprint(value))
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (dict, set, frozenset, list, tuple)):
+        return _container_key_part(value)
+    raise TypeError(f'Argument of type {type(value).__name__} cannot be a part of a cache key.')
+
+# Helper function converting a container argument into a part of a key
+def _container_key_part(value: dict | set | frozenset | list | tuple):
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((repr(k), _key_part(v)) for k, v in value.items())))
+    if isinstance(value, (set, frozenset)):
+        return ('set', tuple(sorted(repr(_key_part(v)) for v in value)))
+    return tuple(_key_part(v) for v in value)
+
+# Helper function writing a cached result where the function writes it when the result is computed
+def _write_output(func: Callable, arguments: dict[str, Any], result: Any):
+    path = arguments.get('output_path')
+    if path is None and func.__name__ in DEFAULT_OUTPUT_PATHS and 'output_path' in arguments:
+        path = DEFAULT_OUTPUT_PATHS[func.__name__].format(**arguments)
+    if path is not None and isinstance(result, pd.DataFrame):
+        result.to_csv(path, index=False)
+
+# Helper function removing a file which may have been already removed by another thread
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
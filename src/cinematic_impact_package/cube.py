@@ -0,0 +1,237 @@
+"""
+This module provides a precomputed region x genre x titleType x decade aggregate cube. The cube
+stores sufficient statistics of ratings (see lib.STATISTICS) in dense NumPy arrays, so quality
+measures for any combination of countries, genres, title types and decades are computed by
+array slicing and summation instead of joining the IMDb tables again.
+"""
+
+import csv
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from cinematic_impact_package import lib
+from cinematic_impact_package.lib import STATISTICS, load_data, measure_values, join_title_region, code_to_country
+
+# Label of the decade bucket of titles without a known start year
+UNKNOWN_DECADE = -1
+
+# Statistics stored as integers in the cube
+INTEGER_STATISTICS = ['count', 'sumVotes', 'flops', 'masterpieces']
+
+# Names of the axes of the cube, in the order of axes of region_stats (genre axes follow the region axis in genre_stats)
+AXES = ['region', 'genre', 'titleType', 'decade']
+
+class AggregateCube:
+    """
+    A dense cube of sufficient statistics of ratings.
+
+    Attributes:
+        regions (np.ndarray): Region codes indexing the first axis.
+        region_names (np.ndarray): Country names of the regions (as returned by the analyses).
+        genres (np.ndarray): Genres indexing the genre axis.
+        title_types (np.ndarray): Title types indexing the title type axis.
+        decades (np.ndarray): First years of decades indexing the decade axis (UNKNOWN_DECADE for unknown years).
+        region_stats (np.ndarray): Statistics with shape (regions, title types, decades, STATISTICS).
+        genre_stats (np.ndarray): Statistics with shape (regions, genres, title types, decades, STATISTICS).
+        thresholds (tuple[float, float]): Values of lib.FLOP_TH and lib.MASTERPIECE_TH the flops and
+            masterpieces were counted with.
+
+    Methods:
+        build(data_paths): Builds the cube in one pass over the IMDb files.
+        load(path): Loads a cube saved with save.
+        save(path): Saves the cube to a compressed .npz file.
+        statistics(where, by_genre): Returns summed statistics of a slice.
+        measure(qm, where, by_genre, **kwargs): Returns a quality measure of a slice.
+    """
+    def __init__(self, axes: dict[str, np.ndarray], region_stats: np.ndarray, genre_stats: np.ndarray,
+                 thresholds: tuple[float, float] | None = None):
+        """
+        Initializes the AggregateCube from its axes and arrays, use build or load to create a cube.
+
+        Args:
+            axes (dict[str, np.ndarray]): Labels of every axis listed in AXES.
+            region_stats (np.ndarray): Statistics with shape (regions, title types, decades, STATISTICS).
+            genre_stats (np.ndarray): Statistics with shape (regions, genres, title types, decades, STATISTICS).
+            thresholds (tuple[float, float], optional): Flop and masterpiece thresholds of the statistics,
+                the current lib.FLOP_TH and lib.MASTERPIECE_TH by default.
+        """
+        self.regions = np.asarray(axes['region'], dtype=str)
+        self.genres = np.asarray(axes['genre'], dtype=str)
+        self.title_types = np.asarray(axes['titleType'], dtype=str)
+        self.decades = np.asarray(axes['decade'], dtype=np.int64)
+        self.region_stats = region_stats
+        self.genre_stats = genre_stats
+        self.thresholds = _current_thresholds() if thresholds is None else tuple(thresholds)
+
+    @cached_property
+    def region_names(self) -> np.ndarray:
+        """
+        np.ndarray: Country names of the regions (as returned by the analyses).
+        """
+        return np.array([code_to_country(region) for region in self.regions], dtype=str)
+
+    @classmethod
+    def build(cls, data_paths: tuple[str, str, str]) -> 'AggregateCube':
+        """
+        Builds the cube from the full IMDb files.
+
+        Args:
+            data_paths (tuple[str, str, str]): Tuple of path to data (basics_path, akas_path, ratings_path).
+
+        Returns:
+            AggregateCube: The cube of all titles.
+        """
+        thresholds = _current_thresholds()
+        merged = _region_titles(data_paths)
+        codes = {}
+        axes = {}
+        for axis in ['region', 'titleType', 'decade']:
+            codes[axis], axes[axis] = pd.factorize(merged[axis], sort=True)
+        shape = tuple(len(axes[axis]) for axis in ['region', 'titleType', 'decade'])
+        region_stats = _accumulate(merged, [codes['region'], codes['titleType'], codes['decade']], shape, thresholds)
+
+        exploded = _explode_genres(merged)
+        genre_codes, axes['genre'] = pd.factorize(exploded['genre'], sort=True)
+        exploded_codes = [pd.Index(axes['region']).get_indexer(exploded['region']), genre_codes,
+                          pd.Index(axes['titleType']).get_indexer(exploded['titleType']),
+                          pd.Index(axes['decade']).get_indexer(exploded['decade'])]
+        genre_stats = _accumulate(exploded, exploded_codes, (shape[0], len(axes['genre'])) + shape[1:], thresholds)
+
+        return cls(axes, region_stats, genre_stats, thresholds)
+
+    @classmethod
+    def load(cls, path: str) -> 'AggregateCube':
+        """
+        Loads a cube saved with save.
+
+        Args:
+            path (str): Path to the .npz file.
+
+        Returns:
+            AggregateCube: The loaded cube.
+
+        Raises:
+            ValueError: If the cube was built with other thresholds than the current lib.FLOP_TH and
+                lib.MASTERPIECE_TH, so that its flop and masterpiece counts are stale.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            thresholds = (float(data['flop_th']), float(data['masterpiece_th'])) if 'flop_th' in data else None
+            if thresholds != _current_thresholds():
+                raise ValueError(f'The cube in {path} was built with thresholds {thresholds} other than the current '
+                                 f'{_current_thresholds()} (FLOP_TH, MASTERPIECE_TH), rebuild it.')
+            axes = {'region': data['regions'], 'genre': data['genres'], 'titleType': data['title_types'],
+                    'decade': data['decades']}
+            return cls(axes, data['region_stats'], data['genre_stats'], thresholds)
+
+    def save(self, path: str):
+        """
+        Saves the cube to a compressed .npz file.
+
+        Args:
+            path (str): Path to the .npz file.
+        """
+        np.savez_compressed(path, regions=self.regions, genres=self.genres, title_types=self.title_types,
+                            decades=self.decades, region_stats=self.region_stats, genre_stats=self.genre_stats,
+                            flop_th=self.thresholds[0], masterpiece_th=self.thresholds[1])
+
+    def statistics(self, where: dict | None = None, by_genre=False) -> pd.DataFrame:
+        """
+        Returns statistics of a slice of the cube summed over title types and decades.
+
+        Args:
+            where (dict, optional): Labels to include for some of the axes: 'country' (country names), 'genre',
+                'titleType' and 'decade' (first years of decades, e.g. 1990), all labels of an axis which is
+                not given are included. Selecting genres without by_genre counts a title once per selected genre.
+            by_genre (bool, optional): Whether to group by genre in addition to region.
+
+        Returns:
+            pd.DataFrame: The DataFrame with 'region' (and 'genre') columns and columns listed in STATISTICS.
+        """
+        region_mask, genres, sliced = self._slice(where or {}, by_genre)
+        return _slice_frame({'region': self.regions[region_mask]}, genres, sliced)
+
+    def measure(self, qm: str, where: dict | None = None, by_genre=False, **kwargs) -> pd.DataFrame:
+        """
+        Computes a quality measure for a slice of the cube.
+
+        Args:
+            qm (str): The quality measure to compute, one of QUALITY_MEASURES keys.
+            where (dict, optional): Labels to include for some of the axes, see statistics.
+            by_genre (bool, optional): Whether to group by genre in addition to country.
+            **kwargs: Additional keyword arguments for the quality measure function.
+
+        Returns:
+            pd.DataFrame: The quality measure for countries (and genres), sorted by the measure when by_genre is set.
+        """
+        region_mask, genres, sliced = self._slice(where or {}, by_genre)
+        stats = _slice_frame({'country': self.region_names[region_mask]}, genres, sliced)
+        result = stats.drop(columns=STATISTICS).assign(**{qm: measure_values(stats, qm, **kwargs)})
+        if by_genre:
+            result = result.sort_values(qm, ascending=False)
+        return result
+
+    def _slice(self, where: dict, by_genre: bool) -> tuple[np.ndarray, np.ndarray | None, np.ndarray]:
+        region_mask = _mask(self.region_names, where.get('country'))
+        type_mask = _mask(self.title_types, where.get('titleType'))
+        decade_mask = _mask(self.decades, where.get('decade'))
+        if not by_genre and where.get('genre') is None:
+            sliced = self.region_stats[np.ix_(region_mask, type_mask, decade_mask)].sum(axis=(1, 2))
+            return region_mask, None, sliced
+        genre_mask = _mask(self.genres, where.get('genre'))
+        sliced = self.genre_stats[np.ix_(region_mask, genre_mask, type_mask, decade_mask)].sum(axis=(2, 3))
+        if not by_genre:
+            return region_mask, None, sliced.sum(axis=1)
+        return region_mask, self.genres[genre_mask], sliced.reshape(-1, len(STATISTICS))
+
+
+# Helper function returning the current flop and masterpiece thresholds of lib
+def _current_thresholds() -> tuple[float, float]:
+    return lib.FLOP_TH, lib.MASTERPIECE_TH
+
+# Helper function loading titles joined with their regions, title types and decades
+def _region_titles(data_paths: tuple[str, str, str]) -> pd.DataFrame:
+    basics_path, akas_path, ratings_path = data_paths
+    basic_info = load_data(basics_path, usecols=['tconst', 'genres', 'titleType', 'startYear'], quoting=csv.QUOTE_NONE)
+    ratings_info = load_data(ratings_path, usecols=['tconst', 'numVotes', 'averageRating'], quoting=csv.QUOTE_NONE)
+    title2info = pd.merge(basic_info, ratings_info, on='tconst')
+    akas_info = load_data(akas_path, usecols=['titleId', 'title', 'region', 'isOriginalTitle'], quoting=csv.QUOTE_NONE)
+    title2reg = join_title_region(akas_info, basic_info['tconst'])
+    del basic_info, akas_info
+
+    years = pd.to_numeric(title2info['startYear'], errors='coerce')
+    title2info['decade'] = (years // 10 * 10).fillna(UNKNOWN_DECADE).astype(np.int64)
+    return pd.merge(title2reg, title2info, on='tconst')
+
+# Helper function splitting titles into a row per genre, titles without genres are skipped
+def _explode_genres(merged: pd.DataFrame) -> pd.DataFrame:
+    has_genres = (merged['genres'] != "\\N").to_numpy()
+    with_genres = merged[has_genres].assign(genre=merged.loc[has_genres, 'genres'].str.split(','))
+    return with_genres.explode('genre')
+
+# Helper function building a DataFrame of a slice of the cube with a row per region (and genre)
+def _slice_frame(group: dict[str, np.ndarray], genres: np.ndarray | None, sliced: np.ndarray) -> pd.DataFrame:
+    if genres is not None:
+        (name, labels), = group.items()
+        group = {name: np.repeat(labels, len(genres)), 'genre': np.tile(genres, len(labels))}
+    stats = pd.DataFrame(group).join(pd.DataFrame(sliced, columns=STATISTICS))
+    stats = stats[stats['count'] > 0].reset_index(drop=True)
+    return stats.astype({col: np.int64 for col in INTEGER_STATISTICS})
+
+# Helper function to sum statistics of rows into a dense array indexed by codes
+def _accumulate(df: pd.DataFrame, codes: list[np.ndarray], shape: tuple[int, ...],
+                thresholds: tuple[float, float]) -> np.ndarray:
+    known = np.logical_and.reduce([code >= 0 for code in codes])
+    flat = np.ravel_multi_index([code[known] for code in codes], shape)
+    rating = df['averageRating'].to_numpy(dtype=float)[known]
+    votes = df['numVotes'].to_numpy(dtype=float)[known]
+    flop_th, masterpiece_th = thresholds
+    weights = [None, votes, rating, rating * votes, (rating < flop_th).astype(float), (rating > masterpiece_th).astype(float)]
+    size = int(np.prod(shape))
+    stats = [np.bincount(flat, weights=weight, minlength=size).astype(float) for weight in weights]
+    return np.stack(stats, axis=-1).reshape(shape + (len(STATISTICS),))
+
+# Helper function to select labels of an axis, all labels when selected is None
+def _mask(labels: np.ndarray, selected) -> np.ndarray:
+    if selected is None:
+        return np.ones(len(labels), dtype=bool)
+    return np.isin(labels, list(selected))
@@ -3,9 +3,13 @@ This module provides demontration of using functions included in lib.py
 """
 
 import argparse
-from cinematic_impact_package.lib import IMDbData, region_genre_analysis, make_comparison, \
-    weak_impact, geopolitical_data, impact_vs_data, split_star_countries, strong_impact, \
+import pandas as pd
+from cinematic_impact_package.lib import DEFAULT_OUTPUT_PATHS, IMDbData, region_genre_analysis, make_comparison, \
+    weak_impact, geopolitical_data, impact_vs_data_batch, split_star_countries, strong_impact, \
     create_representation, get_top_countries, movies_quality
+from cinematic_impact_package.arguments import add_data_arguments
+from cinematic_impact_package.scheduler import TaskGraph
+from cinematic_impact_package.cache import ResultCache
 
 QM = ['sum_votes', 'mean', 'weighted_mean', 'flop_prob', 'masterpiece_prob','two-sided']
 
@@ -26,50 +30,23 @@ KNOWN_GENRES = ['Romance', 'Documentary', 'News', 'Sport', 'Action', 'Adventure'
 KNOWN_PROD_TYPES = ['short', 'movie', 'tvShort', 'tvMovie', 'tvSeries', 'tvEpisode', 'tvMiniSeries',\
                  'tvSpecial', 'video', 'videoGame', 'tvPilot']
 
+REPR_SIZES = [10, 20, 30, 50, 100, 200]
+
+# Size of the representation printed in Task 1, its top countries are reused for the same size in REPR_SIZES
+REPRESENTATION_SIZE = 100
+
+GEO_COLS = ['pop', 'gdp', 'pc']
+
+# Analyses memoized when a cache directory is given
+CACHED_ANALYSES = [geopolitical_data, create_representation, get_top_countries, movies_quality, weak_impact,
+                   strong_impact, region_genre_analysis]
+
 def parse_arguments():
     """
     Function supporting parsing arguments.
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--basics",
-        type=str,
-        required=True,
-        help="Path to the TSV file including cols = ['tconst', 'genres', 'titleType', 'startYear']."
-    )
-    parser.add_argument(
-        "--ratings",
-        type=str,
-        required=True,
-        help="Path to the TSV file including cols = ['tconst', 'numVotes', 'averageRating]."
-    )
-    parser.add_argument(
-        "--akas",
-        type=str,
-        required=True,
-        help="Path to the TSV file including cols = ['titleId','title','region','isOriginalTitle']."
-        )
-    parser.add_argument(
-        "--gdp",
-        type=str,
-        required=True,
-        help="Path to the CSV file with GDP data with column \"Country Code\" \
-        with ISO 3166-1 and columns representing years."
-    )
-    parser.add_argument(
-        "--pop",
-        type=str,
-        required=True,
-        help="Path to the CSV file with population data with column \"Country Code\" \
-        with ISO 3166-1 and columns representing years."
-    )
-    parser.add_argument(
-        "--pc",
-        type=str,
-        required=True,
-        help="Path to the CSV file with GDP per capita data with column \"Country Code\" \
-            with ISO 3166-1 and columns representing years."
-        )
+    add_data_arguments(parser)
     parser.add_argument(
         "--countries",
         type=str,
@@ -115,6 +92,30 @@ def parse_arguments():
         default=100000,
         help="Minimum number of votes required for a movie to be included."
         )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Maximal number of analysis stages run concurrently."
+        )
+    parser.add_argument(
+        "--sample",
+        type=float,
+        default=None,
+        help="Fraction of titles sampled for a quick look, results come with standard errors."
+        )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        help="Directory in which results of analyses are memoized between runs."
+        )
+    parser.add_argument(
+        "--cachesize",
+        type=int,
+        default=1024,
+        help="Maximal size of memoized results in MB."
+        )
     args = parser.parse_args()
     return args
 
@@ -126,68 +127,127 @@ def validate_arguments(args):
         raise ValueError('End year has smalller value than start year.')
     if args.votetreshold < 0:
         raise ValueError('Votetreshold is smaller than 0, it should be nonnegative number.')
+    if args.workers is not None and args.workers < 1:
+        raise ValueError('Number of workers should be positive.')
+    if args.sample is not None and not 0 < args.sample <= 1:
+        raise ValueError('Sample fraction should be in (0, 1].')
+    if args.cachesize < 0:
+        raise ValueError('Cache size is smaller than 0, it should be nonnegative number.')
+
+def build_graph(args) -> TaskGraph:
+    """
+    Function building the task graph of the demonstration program.
+    """
+    qm_args = DEFAULT_QM_ARGS[args.qm]
+    graph = TaskGraph()
+    run = {func.__name__: func for func in CACHED_ANALYSES}
+    if args.cache is not None:
+        cache = ResultCache(args.cache, args.cachesize * 2**20)
+        run = {name: cache.memoize(func) for name, func in run.items()}
+
+    # Initialisation, without the cache all tables are loaded (basics with genres at once) before the analyses,
+    # with the cache they are loaded on demand only by analyses which are not memoized
+    graph.add('data', IMDbData, (), data_paths=(args.basics, args.akas, args.ratings),
+              prod_type=args.prodtype, in_years=(args.start, args.end), sample_fraction=args.sample)
+    graph.add('info_table', _load_info_table, ('data',), load=args.cache is None)
+    graph.add('region_table', _load_region_table, ('info_table',), load=args.cache is None)
+    graph.add('geo', run['geopolitical_data'], (), population_path=args.pop, gdp_path=args.gdp, per_capita_path=args.pc)
+
+    # Movies quality (Task 1)
+    graph.add('representation', run['create_representation'], ('info_table',), repr_size=REPRESENTATION_SIZE,
+              vote_treshold=args.votetreshold)
+    graph.add('top', run['get_top_countries'], ('region_table', 'representation'), qm=args.qm, **qm_args)
+    for repr_num in REPR_SIZES:
+        if repr_num == REPRESENTATION_SIZE:
+            graph.add(f'quality_{repr_num}', _save_quality, ('top',), repr_size=repr_num,
+                      vote_treshold=args.votetreshold, qm=args.qm)
+        else:
+            graph.add(f'quality_{repr_num}', run['movies_quality'], ('region_table',), repr_size=repr_num, qm=args.qm,
+                      vote_treshold=args.votetreshold, **qm_args)
+
+    # Weak and strong impact (Task 2)
+    graph.add('weak', run['weak_impact'], ('region_table',))
+    graph.add('strong', run['strong_impact'], ('region_table',), qm=args.qm, **qm_args)
+    graph.add('weak_split', split_star_countries, ('weak',))
+    graph.add('strong_split', split_star_countries, ('strong',))
+    graph.add('rank_comparison', _regulars_vs_data, ('weak_split', 'strong_split', 'geo'),
+              impact_cols=('sum_votes', args.qm))
+
+    # Additional region-genre analysis (Task3)
+    graph.add('region_genre', run['region_genre_analysis'], ('region_table',), qm=args.qm, **qm_args)
+    graph.add('comparison', make_comparison, ('region_genre',),
+              country_set=None if args.countries is None else set(args.countries),
+              genre_set=None if args.genres is None else set(args.genres))
+    return graph
+
+def _load_info_table(data, load):
+    if load:
+        data.title_info_table()
+    return data
+
+def _load_region_table(data, load):
+    if load:
+        data.title_region_table()
+    return data
+
+def _save_quality(top, repr_size, vote_treshold, qm):
+    top.to_csv(DEFAULT_OUTPUT_PATHS['movies_quality'].format(repr_size=repr_size, vote_treshold=vote_treshold, qm=qm),
+               index=False)
+    return top
+
+def _regulars_vs_data(weak_split, strong_split, data_df, impact_cols):
+    impacts = {'weak': (weak_split[0], impact_cols[0]), 'strong': (strong_split[0], impact_cols[1])}
+    return impact_vs_data_batch(impacts, data_df, GEO_COLS)
 
 def main():
     """
     Main function of demontration program.
     """
-    # Initialisation
+    # Initialisation, with copy-on-write tables of IMDbData shared by concurrent stages are not copied defensively
+    pd.set_option('mode.copy_on_write', True)
     print("\nInitialisation")
     args = parse_arguments()
     validate_arguments(args)
-    md = IMDbData((args.basics, args.akas, args.ratings), args.prodtype, (args.start, args.end))
+    graph = build_graph(args)
+    results = graph.run(args.workers)
 
     # Movies quality (Task 1)
     print("\nTask 1")
-    print(f"Create representation for 100 representants for {args.votetreshold} vote treshold.")
-    qs = create_representation(md, 100,  args.votetreshold)
-    print(qs)
+    print(f"Create representation for {REPRESENTATION_SIZE} representants for {args.votetreshold} vote treshold.")
+    print(results['representation'])
 
     print(f"\nGet top10 countries for chosen representants for {args.votetreshold} vote treshold.")
-    top = get_top_countries(md, qs, args.qm, **DEFAULT_QM_ARGS[args.qm])
-    print(top)
+    print(results['top'])
 
-    for repr_num in [10, 20, 30, 50, 100, 200]:
-        result = movies_quality(md, repr_num, args.qm, args.votetreshold, **DEFAULT_QM_ARGS[args.qm])
+    for repr_num in REPR_SIZES:
         print(f"\nFor {repr_num} best representants we get:")
-        print(result)
+        print(results[f'quality_{repr_num}'])
 
     # Weak impact (Task 2.1)
     print("\nTask 2")
     print("Geopolitical data:")
-    gd = geopolitical_data(args.pop, args.gdp, args.pc)
-    print(gd.head())
-
-    wi = weak_impact(md)
-    print(f'\nWeak impact:\n{wi.head(20)}')
-
-    reg_wi, stars = split_star_countries(wi)
-    print(f"\nHistrorical (*) or undefined (**) countries' weak impact:\n{stars}")
+    print(results['geo'].head())
 
-    impact_vs_data(reg_wi, 'sum_votes', gd, 'pop')
-    impact_vs_data(reg_wi, 'sum_votes', gd, 'gdp')
-    impact_vs_data(reg_wi, 'sum_votes', gd, 'pc')
+    print(f"\nWeak impact:\n{results['weak'].head(20)}")
+    print(f"\nHistrorical (*) or undefined (**) countries' weak impact:\n{results['weak_split'][1]}")
 
     # Strong impact (Task 2.2)
-    si = strong_impact(md, args.qm, **DEFAULT_QM_ARGS[args.qm])
-    print(f'\nStrong impact:\n{si.head(20)}')
+    print(f"\nStrong impact:\n{results['strong'].head(20)}")
+    print(f"\nHistrorical (*) or undefined (**) countries' strong impact:\n{results['strong_split'][1]}")
 
-    reg_si, stars = split_star_countries(si)
-    print(f"\nHistrorical (*) or undefined (**) countries' strong impact:\n{stars}")
-
-    impact_vs_data(reg_si, args.qm, gd, 'pop')
-    impact_vs_data(reg_si, args.qm, gd, 'gdp')
-    impact_vs_data(reg_si, args.qm, gd, 'pc')
+    comparison, correlations = results['rank_comparison']
+    print(f"\nImpact vs geopolitical data rankings:\n{comparison.head(20)}")
+    print(f"\nRank correlations:\n{correlations}")
 
     # Additional region-genre analysis (Task3)
     print("\nTask 3")
     print("Additional region-genre analysis:")
-    result = region_genre_analysis(md, args.qm, **DEFAULT_QM_ARGS[args.qm])
-    print(result)
+    print(results['region_genre'])
+
+    print(f"\nComparison for countries: {args.countries} and genres: {args.genres}:\n{results['comparison']}")
 
-    comparison = make_comparison(result, None if args.countries is None else set(args.countries), \
-                                                None if args.genres is None else set(args.genres))
-    print(f"\nComparison for countries: {args.countries} and genres: {args.genres}:\n{comparison}")
+    path, duration = graph.critical_path()
+    print(f"\nCritical path ({duration:.2f} s): {' -> '.join(path)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,200 @@
+"""
+This module provides per-region (and per-region x genre) histograms of ratings. IMDb ratings lie on
+a fixed 0.1 grid from 1.0 to 10.0, so a histogram of a group with a bin per grid value describes its
+ratings exactly. Threshold measures with any cut-offs, threshold sweeps and quantiles are computed
+from cumulative histograms without reading title rows again.
+"""
+
+import numpy as np
+import pandas as pd
+from cinematic_impact_package.lib import FLOP_TH, MASTERPIECE_TH, IMDbData, measure_from_statistics, \
+    region_country_change
+
+# Ratings of the bins of a histogram
+RATING_GRID = np.round(np.arange(10, 101) / 10, 1)
+
+# Tolerance of comparisons of thresholds with ratings of the grid
+GRID_TOLERANCE = 1e-9
+
+class RatingHistogram:
+    """
+    Count-weighted and vote-weighted histograms of ratings of titles in every region (and genre).
+
+    Attributes:
+        groups (pd.DataFrame): The 'region' (and 'genre') of every histogram, sorted.
+        counts (np.ndarray): Numbers of titles with shape (groups, RATING_GRID).
+        votes (np.ndarray): Numbers of votes of titles with shape (groups, RATING_GRID).
+
+    Methods:
+        build(dc, by_genre): Builds histograms of an IMDbData in one pass over its titles.
+        load(path): Loads histograms saved with save.
+        save(path): Saves histograms to a compressed .npz file.
+        statistics(flop_th, masterpiece_th): Returns sufficient statistics (see lib.STATISTICS) for given thresholds.
+        measure(qm, flop_th, masterpiece_th, **kwargs): Returns a quality measure for given thresholds.
+        sweep(thresholds, above, weighted): Returns shares of titles below (or above) every threshold.
+        quantiles(qs, weighted): Returns quantiles of ratings.
+    """
+    def __init__(self, groups: pd.DataFrame, counts: np.ndarray, votes: np.ndarray):
+        """
+        Initializes the RatingHistogram from its groups and arrays, use build or load to create histograms.
+        """
+        self.groups = groups.reset_index(drop=True)
+        self.counts = counts
+        self.votes = votes
+        self._cum_counts = _cumulative(counts)
+        self._cum_votes = _cumulative(votes)
+
+    @classmethod
+    def build(cls, dc: IMDbData, by_genre=False) -> 'RatingHistogram':
+        """
+        Builds histograms of ratings of titles of an IMDbData.
+
+        Args:
+            dc (IMDbData): An instance of the IMDbData (or of a compatible backend).
+            by_genre (bool, optional): Whether to build a histogram per region and genre instead of per region.
+
+        Returns:
+            RatingHistogram: The histograms.
+        """
+        group_by = ['region', 'genre'] if by_genre else ['region']
+        title2info = dc.title_info_table(['tconst', 'genres', 'averageRating', 'numVotes'] if by_genre
+                                         else ['tconst', 'averageRating', 'numVotes'])
+        if by_genre:
+            title2info = title2info[title2info['genres'] != "\\N"]
+            title2info = title2info.assign(genre=title2info['genres'].str.split(',')).explode('genre')
+        merged = pd.merge(dc.title_region_table(), title2info, on='tconst')
+        # Rows without a group (e.g. the 'NA' code of Namibia read as NaN) are skipped as by groupby in lib
+        merged = merged.dropna(subset=['averageRating', *group_by])
+
+        bins = np.rint(merged['averageRating'].to_numpy(dtype=float) * 10).astype(np.int64) - 10
+        if len(bins) and (bins.min() < 0 or bins.max() >= len(RATING_GRID)):
+            raise ValueError('Ratings should be in [1.0, 10.0].')
+        group_codes = merged.groupby(group_by, sort=True).ngroup().to_numpy()
+        groups = merged[group_by].drop_duplicates().sort_values(group_by)
+        flat = group_codes * len(RATING_GRID) + bins
+        shape = (len(groups), len(RATING_GRID))
+        counts = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+        votes = np.bincount(flat, weights=merged['numVotes'].to_numpy(dtype=float),
+                            minlength=shape[0] * shape[1]).reshape(shape)
+        return cls(groups, counts.astype(np.int64), votes.astype(np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> 'RatingHistogram':
+        """
+        Loads histograms saved with save.
+
+        Args:
+            path (str): Path to the .npz file.
+
+        Returns:
+            RatingHistogram: The loaded histograms.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            groups = pd.DataFrame({col: data[f'group_{col}'] for col in np.asarray(data['group_columns']).tolist()})
+            return cls(groups.astype(object), data['counts'], data['votes'])
+
+    def save(self, path: str):
+        """
+        Saves histograms to a compressed .npz file.
+
+        Args:
+            path (str): Path to the .npz file.
+        """
+        groups = {f'group_{col}': self.groups[col].to_numpy(dtype=str) for col in self.groups.columns}
+        np.savez_compressed(path, group_columns=np.array(self.groups.columns, dtype=str), counts=self.counts,
+                            votes=self.votes, **groups)
+
+    def statistics(self, flop_th: float = FLOP_TH, masterpiece_th: float = MASTERPIECE_TH) -> pd.DataFrame:
+        """
+        Returns sufficient statistics of every group with flops and masterpieces counted for given thresholds.
+
+        Args:
+            flop_th (float, optional): Titles rated below it are flops.
+            masterpiece_th (float, optional): Titles rated above it are masterpieces.
+
+        Returns:
+            pd.DataFrame: The DataFrame with 'region' (and 'genre') columns and columns listed in lib.STATISTICS.
+        """
+        return self.groups.assign(
+            count=self._cum_counts[:, -1],
+            sumVotes=self._cum_votes[:, -1],
+            sumRating=self.counts @ RATING_GRID,
+            sumRatingVotes=self.votes @ RATING_GRID,
+            flops=self._cum_counts[:, _bins_below(flop_th)],
+            masterpieces=self._cum_counts[:, -1] - self._cum_counts[:, _bins_up_to(masterpiece_th)])
+
+    def measure(self, qm: str, flop_th: float = FLOP_TH, masterpiece_th: float = MASTERPIECE_TH,
+                **kwargs) -> pd.DataFrame:
+        """
+        Computes a quality measure of every group for given thresholds.
+
+        Args:
+            qm (str): The quality measure to compute, one of QUALITY_MEASURES keys.
+            flop_th (float, optional): Titles rated below it are flops.
+            masterpiece_th (float, optional): Titles rated above it are masterpieces.
+            **kwargs: Additional keyword arguments for the quality measure function.
+
+        Returns:
+            pd.DataFrame: The quality measure for countries (and genres).
+        """
+        return measure_from_statistics(self.statistics(flop_th, masterpiece_th), qm, **kwargs)
+
+    def sweep(self, thresholds, above=False, weighted=False) -> pd.DataFrame:
+        """
+        Computes shares of titles rated below (or above) every threshold.
+
+        Args:
+            thresholds (Iterable[float]): The thresholds.
+            above (bool, optional): Whether to compute shares of titles rated above instead of below thresholds.
+            weighted (bool, optional): Whether to compute shares of votes instead of shares of titles.
+
+        Returns:
+            pd.DataFrame: The DataFrame with 'country' (and 'genre') columns and a column per threshold.
+        """
+        cum = self._cum_votes if weighted else self._cum_counts
+        total = cum[:, -1:].astype(float)
+        thresholds = list(thresholds)
+        if above:
+            shares = (total - cum[:, [_bins_up_to(th) for th in thresholds]]) / total
+        else:
+            shares = cum[:, [_bins_below(th) for th in thresholds]] / total
+        result = self.groups.join(pd.DataFrame(shares, columns=thresholds))
+        return region_country_change(result)
+
+    def quantiles(self, qs, weighted=False) -> pd.DataFrame:
+        """
+        Computes exact quantiles of ratings of every group (the smallest rating whose cumulative share
+        is at least q, as the 'inverted_cdf' method of np.quantile).
+
+        Args:
+            qs (Iterable[float]): Quantiles to compute, in [0, 1].
+            weighted (bool, optional): Whether to weight ratings of titles by their numbers of votes.
+
+        Returns:
+            pd.DataFrame: The DataFrame with 'country' (and 'genre') columns and a column per quantile.
+        """
+        qs = list(qs)
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError('Quantiles should be in [0, 1].')
+        cum = (self._cum_votes if weighted else self._cum_counts)[:, 1:]
+        # Weights are integers, so the first bin reaching a positive target of at most 1 is the first non-empty bin
+        targets = np.maximum(np.outer(cum[:, -1], qs), 1)
+        bins = np.stack([np.searchsorted(row, target) for row, target in zip(cum, targets)]) \
+            if len(cum) else np.empty((0, len(qs)), dtype=np.int64)
+        values = RATING_GRID[np.minimum(bins, len(RATING_GRID) - 1)]
+        values[cum[:, -1] == 0] = np.nan
+        result = self.groups.join(pd.DataFrame(values, columns=qs))
+        return region_country_change(result)
+
+
+# Helper function to compute cumulative histograms with a leading zero column
+def _cumulative(hist: np.ndarray) -> np.ndarray:
+    return np.concatenate([np.zeros((len(hist), 1), dtype=hist.dtype), np.cumsum(hist, axis=1)], axis=1)
+
+# Helper function to count bins of ratings strictly below a threshold
+def _bins_below(threshold: float) -> int:
+    return int(np.searchsorted(RATING_GRID, threshold - GRID_TOLERANCE, side='right'))
+
+# Helper function to count bins of ratings not above a threshold
+def _bins_up_to(threshold: float) -> int:
+    return int(np.searchsorted(RATING_GRID, threshold + GRID_TOLERANCE, side='right'))
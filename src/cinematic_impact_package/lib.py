@@ -4,10 +4,19 @@ from IMDb. It includes functions to calculate movie quality measures, analyze re
 compare geopolitical data.
 """
 
+import csv
+import io
+import mmap
+import multiprocessing
+import os
+import threading
 import warnings
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from math import isnan
+import numpy as np
 import pandas as pd
 from pycountry import countries, historic_countries
+from cinematic_impact_package.sampling import COMPRESSED_SUFFIXES, sample_lines
 
 # Using filterwarnings to ignore pd.errors.DtypeWarning, types in IMDb are mixed
 warnings.filterwarnings(action='ignore', category=pd.errors.DtypeWarning)
@@ -19,6 +28,36 @@ FLOP_TH = 3
 MASTERPIECE_TH = 7
 VOTE_TH = 100000
 
+# Paths of CSV files written by analyses called without output_path, formatted with arguments of the analysis
+DEFAULT_OUTPUT_PATHS = {
+    'movies_quality': "out/task1_repr_{repr_size}_th_{vote_treshold}_{qm}.csv",
+    'region_genre_analysis': "out/task3_{qm}_country_vs_genre.csv"
+}
+
+# Columns of the basics file which are loaded only when an analysis requests them
+OPTIONAL_BASICS_COLUMNS = ['genres']
+
+# Uncompressed unquoted files at least this large are parsed in parallel by load_data when workers are given
+PARALLEL_PARSE_MIN_BYTES = 256 * 2**20
+
+# Quality measures which are totals, their values computed on a sample are rescaled by the sampled fraction
+TOTAL_MEASURES = {'sum_votes'}
+
+# Decomposable per-group sufficient statistics, quality measures can be derived from their sums
+STATISTICS = ['count', 'sumVotes', 'sumRating', 'sumRatingVotes', 'flops', 'masterpieces']
+
+# Quality measures computable from STATISTICS, keyed by the measure name and its sorted keyword arguments
+STATISTICS_MEASURES = {
+    ('sum_votes', ('col', 'numVotes')): lambda s: s['sumVotes'],
+    ('sum_votes', ('col', 'averageRating')): lambda s: s['sumRating'],
+    ('mean', ('col', 'numVotes')): lambda s: s['sumVotes']/s['count'],
+    ('mean', ('col', 'averageRating')): lambda s: s['sumRating']/s['count'],
+    ('weighted_mean', ('data', 'averageRating'), ('weight', 'numVotes')): lambda s: s['sumRatingVotes']/s['sumVotes'],
+    ('flop_prob', ('col', 'averageRating')): lambda s: s['flops']/s['count'],
+    ('masterpiece_prob', ('col', 'averageRating')): lambda s: s['masterpieces']/s['count'],
+    ('two-sided', ('col', 'averageRating')): lambda s: (s['masterpieces'] - s['flops'])/s['count']
+}
+
 QUALITY_MEASURES = {
     'sum_votes': lambda x, **kwargs: sum(x[kwargs['col']]),
     'mean': lambda x, **kwargs: sum(x[kwargs['col']])/len(x),
@@ -28,54 +67,149 @@ QUALITY_MEASURES = {
     'two-sided': lambda x, **kwargs: (sum(x[kwargs['col']]>MASTERPIECE_TH) - sum(x[kwargs['col']]<FLOP_TH))/len(x)
 }
 
+# Per-title terms of QUALITY_MEASURES as (numerator, denominator), a measure of a group is the sum of numerators
+# over the sum of denominators of its titles (a denominator of None is no division), computed without Python loops
+MEASURE_TERMS = {
+    'sum_votes': lambda x, **kwargs: (x[kwargs['col']], None),
+    'mean': lambda x, **kwargs: (x[kwargs['col']], 1),
+    'weighted_mean': lambda x, **kwargs: (x[kwargs['data']]*x[kwargs['weight']], x[kwargs['weight']]),
+    'flop_prob': lambda x, **kwargs: ((x[kwargs['col']]<FLOP_TH).astype('int64'), 1),
+    'masterpiece_prob': lambda x, **kwargs: ((x[kwargs['col']]>MASTERPIECE_TH).astype('int64'), 1),
+    'two-sided': lambda x, **kwargs: ((x[kwargs['col']]>MASTERPIECE_TH).astype('int64')
+                                      - (x[kwargs['col']]<FLOP_TH).astype('int64'), 1)
+}
+
 class IMDbData:
     """
     A class to handle loading and preprocessing of movie data.
+
+    Tables are loaded and joined when they are first requested, so analyses which use only the
+    title info table never read the akas file, and the region table can be built in the background
+    with prefetch() while other analyses run. Instances can be shared between threads.
     
     Attributes:
         title2info (pd.DataFrame): DataFrame containing combined basic and ratings info for titles from IMDb.
         title2reg (pd.DataFrame): DataFrame containing information about the region of origin for titles from IMDb.
     
     Methods:
-        title_info_table(): Returns the combined basic and ratings info table.
+        title_info_table(columns): Returns the combined basic and ratings info table.
         title_region_table(): Returns the information table about the region of origin.
+        prefetch(columns): Starts building the title info and region tables in a background thread.
+        fingerprint(): Returns a tuple identifying the input files and parameters of the data.
     """
-    def __init__(self, data_paths: tuple[str, str, str], prod_type: str, in_years: tuple[int, int]):
+    def __init__(self, data_paths: tuple[str, str, str], prod_type: str, in_years: tuple[int, int],
+                 sample_fraction: float | None = None, sample_seed: int = 0):
         """
-        Initializes the IMDbData by loading and merging data from different sources.
+        Initializes the IMDbData, no data is loaded until a table is requested.
         
         Args:
             data_path (tuple[str, str, str]): Tuple of path to data (basics_path, akas_path, ratings_path).
             prod_type (str): The type of titles to filter (e.g., 'movie', 'tvEpisode', 'short', 'videoGame').
             in_years (tuple[int, int]): Tuple of ints representing start and end year for filtering titles.
+            sample_fraction (float, optional): Fraction of titles to load. Titles are sampled by hash of their
+                id while reading the files, so basics, ratings and akas keep the same titles.
+            sample_seed (int, optional): Seed of the hash used for sampling.
+        """
+        if sample_fraction is not None and not 0 < sample_fraction <= 1:
+            raise ValueError('Sample fraction should be in (0, 1].')
+        self.data_paths = tuple(data_paths)
+        self.prod_type = prod_type
+        self.in_years = tuple(in_years)
+        self.sample_fraction = sample_fraction
+        self.sample_seed = sample_seed
+
+        # Lazily loaded tables and the future of the prefetch, guarded by the 'info' and 'region' locks
+        self._state = {'title2info': None, 'in_type': None, 'title2reg': None, 'prefetch': None}
+        self._locks = {'info': threading.Lock(), 'region': threading.Lock()}
+
+    @property
+    def title2info(self) -> pd.DataFrame:
+        """
+        The combined basic and ratings info table with all columns, see title_info_table.
         """
-        basics_path, akas_path, ratings_path = data_paths
-        title2info, in_type = self.setup_title2info(basics_path, ratings_path, prod_type, in_years)
-        title2reg = self.setup_title2reg(akas_path, in_type)
+        return self.title_info_table()
 
-        self.title2info = title2info
-        self.title2reg = title2reg
+    @property
+    def title2reg(self) -> pd.DataFrame:
+        """
+        The information table about the region of origin, see title_region_table.
+        """
+        return self.title_region_table()
 
-    def title_info_table(self) -> pd.DataFrame:
+    def title_info_table(self, columns: list[str] | None = None) -> pd.DataFrame:
         """
-        Returns the combined basic and ratings info table.
+        Returns the combined basic and ratings info table, loading it on the first call.
+
+        Optional columns of the basics file (see OPTIONAL_BASICS_COLUMNS) are read only when they are
+        requested, a later request of a missing column reads just that column and joins it to the table.
         
+        Args:
+            columns (list[str], optional): Columns of the table to return, all columns by default.
+
         Returns:
             pd.DataFrame: The combined data table.
         """
-        return self.title2info
+        optional = OPTIONAL_BASICS_COLUMNS if columns is None else \
+            [col for col in OPTIONAL_BASICS_COLUMNS if col in columns]
+        with self._locks['info']:
+            basics_path, _, ratings_path = self.data_paths
+            table = self._state['title2info']
+            if table is None:
+                table, self._state['in_type'] = self.setup_title2info(basics_path, ratings_path, self.prod_type,
+                                                                      self.in_years, optional)
+            missing = [col for col in optional if col not in table.columns]
+            if missing:
+                extra = load_data(basics_path, usecols=['tconst'] + missing, sample=self._sample(),
+                                  quoting=csv.QUOTE_NONE)
+                table = pd.merge(table, extra, on='tconst')
+            self._state['title2info'] = table
+        return table if columns is None else table[list(columns)]
 
     def title_region_table(self) -> pd.DataFrame:
         """
-        Returns the information table about the region of origin.
+        Returns the information table about the region of origin, loading it on the first call.
+        If a finished prefetch failed, its exception is raised.
         
         Returns:
             pd.DataFrame: The information table about the region of origin.
         """
-        return self.title2reg
+        prefetched = self._state['prefetch']
+        if prefetched is not None and prefetched.done() and prefetched.exception() is not None:
+            raise prefetched.exception()
+        with self._locks['region']:
+            if self._state['title2reg'] is None:
+                self.title_info_table(columns=['tconst'])
+                self._state['title2reg'] = self.setup_title2reg(self.data_paths[1], self._state['in_type'])
+            return self._state['title2reg']
+
+    def prefetch(self, columns: list[str] | None = None) -> Future:
+        """
+        Starts building the title info table and the region table in a background thread.
 
-    def setup_title2info(self, basics_path: str, ratings_path: str, prod_type: str, in_years: tuple[int, int]) \
-                                                                        -> tuple[pd.DataFrame, pd.DataFrame]:
+        Args:
+            columns (list[str], optional): Columns of the title info table needed later, so that optional
+                columns of the basics file are read by the first load, all columns by default.
+
+        Returns:
+            Future: The future of the prefetch, it holds the exception of a failed prefetch.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._state['prefetch'] = executor.submit(_prefetch_tables, self, columns)
+        executor.shutdown(wait=False)
+        return self._state['prefetch']
+
+    def fingerprint(self) -> tuple:
+        """
+        Returns a tuple identifying the input files (path, size, modification time) and the parameters of the data.
+
+        Returns:
+            tuple: The fingerprint of the data.
+        """
+        return (type(self).__name__, tuple(file_fingerprint(path) for path in self.data_paths),
+                self.prod_type, self.in_years, self.sample_fraction, self.sample_seed)
+
+    def setup_title2info(self, basics_path: str, ratings_path: str, prod_type: str, in_years: tuple[int, int],
+                         basics_columns: list[str] | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
         """
         Set up the title to information mapping for a specific production type and year range.
 
@@ -88,20 +222,20 @@ class IMDbData:
             ratings_path (str): The file path to the ratings information data.
             prod_type (str): The type of production to filter (e.g., 'movie', 'tvEpisode', 'short', 'videoGame').
             in_years (tuple[int, int]): (the start year of the range to filter,the end year of the range to filter)
+            basics_columns (list[str], optional): Optional columns of the basic information to load,
+                all of OPTIONAL_BASICS_COLUMNS by default.
 
         Returns:
             tuple[pd.DataFrame, pd.DataFrame]: A tuple containing two DataFrames:
                 - title2info: A DataFrame with the merged basic and ratings information for the filtered titles.
                 - in_type: A DataFrame with the filtered titles (tconst) for the specified production type and year range.
         """
-        basic_info = load_data(basics_path, usecols=['tconst', 'genres', 'titleType', 'startYear'])
-        basic_info_type = basic_info[basic_info['titleType'] == prod_type]
-        in_type = basic_info_type[basic_info_type['startYear'].isin([str(x) for x in range(in_years[0], in_years[1]+1)])]
-        in_type_filter = in_type['tconst']
-        ratings_info = load_data(ratings_path, usecols=['tconst', 'numVotes', 'averageRating'])
-        merged_info = pd.merge(basic_info, ratings_info, on='tconst')
-        title2info = pd.merge(in_type_filter, merged_info, on='tconst')
-        return title2info, in_type_filter
+        basics_columns = OPTIONAL_BASICS_COLUMNS if basics_columns is None else basics_columns
+        basic_info = load_data(basics_path, usecols=['tconst', 'titleType', 'startYear', *basics_columns],
+                               sample=self._sample(), quoting=csv.QUOTE_NONE)
+        ratings_info = load_data(ratings_path, usecols=['tconst', 'numVotes', 'averageRating'], sample=self._sample(),
+                                 quoting=csv.QUOTE_NONE)
+        return join_title_info(basic_info, ratings_info, prod_type, in_years)
 
     def setup_title2reg(self, akas_path: str, in_type: pd.DataFrame) -> pd.DataFrame:
         """
@@ -118,29 +252,96 @@ class IMDbData:
         Returns:
             pd.DataFrame: A DataFrame with the mapping of titles (tconst) to regions.
         """
-        akas_info = load_data(akas_path, usecols=['titleId','title','region','isOriginalTitle'])
-        akas_info = akas_info.rename(columns={'titleId': "tconst"})
-        akas_in_type = pd.merge(in_type, akas_info, on='tconst')
-        org_titles = akas_in_type[akas_in_type['isOriginalTitle'] == 1][['tconst', 'title']]
-        prepared_akas = akas_in_type[akas_in_type['isOriginalTitle'] == 0][["tconst", 'title', 'region']]
-        title2reg = pd.merge(org_titles, prepared_akas, on=["title", "tconst"])[["tconst", 'region']]
-        return title2reg
+        akas_info = load_data(akas_path, usecols=['titleId','title','region','isOriginalTitle'], sample=self._sample(),
+                              quoting=csv.QUOTE_NONE)
+        return join_title_region(akas_info, in_type)
 
+    def _sample(self) -> tuple[float, int] | None:
+        return None if self.sample_fraction is None else (self.sample_fraction, self.sample_seed)
 
-def load_data(file, delim='\t', usecols=None) -> pd.DataFrame:
+
+def region_statistics(dc: IMDbData, by_genre=False) -> pd.DataFrame:
+    """
+    Computes sufficient statistics of titles' ratings for each region (and genre).
+
+    Statistics are sums, so statistics computed for disjoint sets of titles can be merged by summing them.
+
+    Backends providing their own region_statistics method (e.g. sqlstore.SQLiteIMDbData) compute them directly.
+
+    Args:
+        dc (IMDbData): An instance of the IMDbData.
+        by_genre (bool, optional): Whether to group by genre in addition to region.
+
+    Returns:
+        pd.DataFrame: The DataFrame with 'region' (and 'genre') columns and columns listed in STATISTICS.
+    """
+    if hasattr(dc, 'region_statistics'):
+        return dc.region_statistics(by_genre)
+    title2info = dc.title_info_table(['tconst', 'genres', 'averageRating', 'numVotes'] if by_genre
+                                     else ['tconst', 'averageRating', 'numVotes'])
+    return region_statistics_from_tables(title2info, dc.title_region_table(), by_genre)
+
+def measure_from_statistics(stats: pd.DataFrame, qm: str, **kwargs) -> pd.DataFrame:
+    """
+    Computes a quality measure for each group from its sufficient statistics.
+
+    Args:
+        stats (pd.DataFrame): The DataFrame returned by region_statistics (or sums of such DataFrames).
+        qm (str): The quality measure to compute, one of QUALITY_MEASURES keys.
+        **kwargs: Additional keyword arguments for the quality measure function.
+
+    Returns:
+        pd.DataFrame: The DataFrame with 'country' (and 'genre') columns and the quality measure column.
+    """
+    group_by = [col for col in stats.columns if col not in STATISTICS]
+    result = stats[group_by].assign(**{qm: measure_values(stats, qm, **kwargs)})
+    return region_country_change(result)
+
+def measure_values(stats: pd.DataFrame, qm: str, **kwargs) -> pd.Series:
+    """
+    Computes values of a quality measure from sufficient statistics.
+
+    Args:
+        stats (pd.DataFrame): The DataFrame with columns listed in STATISTICS.
+        qm (str): The quality measure to compute, one of QUALITY_MEASURES keys.
+        **kwargs: Additional keyword arguments for the quality measure function.
+
+    Returns:
+        pd.Series: The quality measure of every row of stats.
+    """
+    fun = _statistics_measure(qm, kwargs)
+    if fun is None:
+        raise ValueError(f'Quality measure {qm} with arguments {kwargs} cannot be computed from sufficient statistics.')
+    return fun(stats)
+
+def load_data(file, delim='\t', usecols=None, sample=None, workers=None, **kwargs) -> pd.DataFrame:
     """
     Loads data from a file into a pandas DataFrame.
+
+    With workers > 1, uncompressed files of at least PARALLEL_PARSE_MIN_BYTES read with
+    quoting=csv.QUOTE_NONE are split into byte ranges aligned to line boundaries, which are parsed
+    in parallel worker processes. Quoted fields may span lines, so other files are parsed serially.
     
     Args:
         file (str): Path to the data file.
         delim (str): Delimiter used in the data file.
         usecols (list, optional): List of columns to read from the file.
+        sample (tuple[float, int], optional): (fraction, seed), when given only rows whose first column
+            hashes into the fraction are parsed, rows with equal first columns are kept or skipped together.
+        workers (int, optional): Number of processes parsing a large file, 1 (serial parsing) by default.
+        **kwargs: Additional keyword arguments passed to pd.read_csv (e.g. dtype or quoting).
     
     Returns:
         pd.DataFrame: The loaded data as a DataFrame.
     """
     print(f"Loading {file}...")
-    dataframe = pd.read_csv(file, delimiter=delim, usecols=usecols)
+    if sample is not None:
+        file = sample_lines(file, delim, *sample)
+    read_kwargs = {'delimiter': delim, 'usecols': usecols, **kwargs}
+    if (workers or 1) > 1 and read_kwargs.get('quoting') == csv.QUOTE_NONE and _is_splittable(file):
+        dataframe = _parallel_read_csv(file, workers, read_kwargs)
+    else:
+        dataframe = pd.read_csv(file, **read_kwargs)
     print("Loaded")
     return dataframe
 
@@ -156,11 +357,10 @@ def create_representation(dc: IMDbData, repr_size: int, vote_treshold=VOTE_TH) -
     Returns:
         pd.DataFrame: The representation table of top-rated movies.
     """
-    rating_movies = dc.title_info_table()[['tconst','averageRating', 'numVotes']]
+    rating_movies = dc.title_info_table(['tconst', 'averageRating', 'numVotes'])
     if vote_treshold is not None:
         rating_movies = rating_movies[rating_movies['numVotes'] > vote_treshold]
-    rating_movies.sort_values('averageRating', ascending=False, inplace=True)
-    representation = rating_movies.head(repr_size)
+    representation = _top_rows(rating_movies, 'averageRating', repr_size)
     return representation
 
 def get_top_countries(dc: IMDbData, representation_table: pd.DataFrame,  qm: str, **kwargs) -> pd.DataFrame:
@@ -181,10 +381,9 @@ def get_top_countries(dc: IMDbData, representation_table: pd.DataFrame,  qm: str
     title2reg_with_rating = pd.merge(title2reg, representation_table, on="tconst")
 
     top_countries = _apply_measure(title2reg_with_rating, ['region', 'numVotes', 'averageRating'], ['region'], qm, **kwargs)
-    top_countries_renamed = _region_country_change(top_countries)
+    top_countries_renamed = region_country_change(top_countries)
 
-    top_countries_renamed.sort_values(qm, ascending=False, inplace=True)
-    result = top_countries_renamed.head(10)
+    result = _top_rows(top_countries_renamed, qm, 10)
     return result
 
 def movies_quality(dc: IMDbData, repr_size: int, qm: str, vote_treshold=VOTE_TH, output_path=None, **kwargs) -> pd.DataFrame:
@@ -207,7 +406,8 @@ def movies_quality(dc: IMDbData, repr_size: int, qm: str, vote_treshold=VOTE_TH,
     if output_path is not None:
         result.to_csv(output_path, index=False)
     else:
-        result.to_csv(f"out/task1_repr_{repr_size}_th_{vote_treshold}_{qm}.csv", index=False)
+        result.to_csv(DEFAULT_OUTPUT_PATHS['movies_quality'].format(repr_size=repr_size, vote_treshold=vote_treshold,
+                                                                   qm=qm), index=False)
     return result
 
 def weak_impact(dc: IMDbData) -> pd.DataFrame:
@@ -218,14 +418,19 @@ def weak_impact(dc: IMDbData) -> pd.DataFrame:
         dc (IMDbData): An instance of the IMDbData.
     
     Returns:
-        pd.DataFrame: The weak impact of countries.
+        pd.DataFrame: The weak impact of countries. For sampled data sums are rescaled by the sampled
+        fraction and their standard errors are given in the 'sum_votes_se' column.
     """
+    if hasattr(dc, 'region_statistics'):
+        return measure_from_statistics(dc.region_statistics(), 'sum_votes', col='numVotes')
+
     title2reg = dc.title_region_table()
-    title2rating = dc.title_info_table()[['tconst','averageRating', 'numVotes']]
+    title2rating = dc.title_info_table(['tconst', 'averageRating', 'numVotes'])
     title2reg_with_rating = pd.merge(title2reg, title2rating, on="tconst")
 
     wi = _apply_measure(title2reg_with_rating, ['region', 'numVotes'], ['region'], 'sum_votes', col='numVotes')
-    wi = _region_country_change(wi)
+    wi = _with_sampling_error(wi, title2reg_with_rating, ['region'], dc, 'sum_votes', col='numVotes')
+    wi = region_country_change(wi)
     return wi
 
 def strong_impact(dc: IMDbData, qm: str, **kwargs) -> pd.DataFrame:
@@ -238,14 +443,18 @@ def strong_impact(dc: IMDbData, qm: str, **kwargs) -> pd.DataFrame:
         **kwargs: Additional keyword arguments for the quality measure function.
     
     Returns:
-        pd.DataFrame: The strong impact of countries.
+        pd.DataFrame: The strong impact of countries. For sampled data standard errors are given in the '<qm>_se' column.
     """
+    if hasattr(dc, 'region_statistics') and _statistics_measure(qm, kwargs) is not None:
+        return measure_from_statistics(dc.region_statistics(), qm, **kwargs)
+
     title2reg = dc.title_region_table()
-    title2rating = dc.title_info_table()[['tconst','averageRating', 'numVotes']]
+    title2rating = dc.title_info_table(['tconst', 'averageRating', 'numVotes'])
     title2reg_with_rating = pd.merge(title2reg, title2rating, on="tconst")
 
     si = _apply_measure(title2reg_with_rating, ['region', 'numVotes', 'averageRating'], ['region'], qm, **kwargs)
-    si = _region_country_change(si)
+    si = _with_sampling_error(si, title2reg_with_rating, ['region'], dc, qm, **kwargs)
+    si = region_country_change(si)
     return si
 
 def split_star_countries(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
@@ -296,7 +505,7 @@ def geopolitical_data(population_path: str, gdp_path: str, per_capita_path: str)
     result = pd.merge(population, gdp, on="Country Code")
     result = pd.merge(result, per_capita, on="Country Code")
 
-    result['country'] = result['Country Code'].map(_code_to_country)
+    result['country'] = result['Country Code'].map(code_to_country)
     result = result[result['country'] != ""]
     return result[['country', 'pop', 'gdp', 'pc']]
 
@@ -311,21 +520,67 @@ def impact_vs_data(impact_df: pd.DataFrame, impact_col: str, data_df: pd.DataFra
         data_col (str): The column in the geopolitical data to compare.
         output_path (str, optional): Path to save the output CSV file.
     """
-    data_rating = data_df.sort_values(data_col, ascending = False)
-    impact_rating = impact_df.sort_values(impact_col, ascending=False)
-
-    data_rating['dataRating'] = data_rating[data_col].rank(method='dense', ascending=False)
-    impact_rating['impactRating'] = impact_rating[impact_col].rank(method='dense', ascending=False)
+    data_rating = data_df[['country']].assign(dataRating=data_df[data_col].rank(method='dense', ascending=False))
+    impact_rating = impact_df[['country']].assign(impactRating=impact_df[impact_col].rank(method='dense', ascending=False))
 
     result = pd.merge(impact_rating, data_rating, on='country')
-    result['difference'] = result['dataRating'] - result['impactRating']
-    result = result[['country', 'impactRating', 'dataRating', 'difference']].sort_values('difference', ascending=False)
+    result = result.assign(difference=result['dataRating'] - result['impactRating'])
+    result = _top_rows(result, 'difference')
 
     if output_path is not None:
         result.to_csv(output_path, index=False)
     else:
         result.to_csv(f"out/task2_{impact_col}_to_{data_col}.csv", index=False)
 
+def impact_vs_data_batch(impacts: dict[str, tuple[pd.DataFrame, str]], data_df: pd.DataFrame,
+                         data_cols: list[str] | None = None, output_path=None, correlation_path=None) \
+                                                                    -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compares several impact columns with several geopolitical indicators at once and saves the result.
+
+    Every column is dense-ranked once and all frames are joined on an integer country key, so no merged
+    frame is built per (impact, indicator) pair. Countries appearing more than once in a frame keep
+    their best rank.
+
+    Args:
+        impacts (dict[str, tuple[pd.DataFrame, str]]): Mapping of labels to (impact DataFrame, impact column).
+        data_df (pd.DataFrame): The DataFrame containing geopolitical data.
+        data_cols (list[str], optional): Columns of the geopolitical data to compare, all of
+            ['pop', 'gdp', 'pc'] by default.
+        output_path (str, optional): Path to save the rank difference table as a CSV file.
+        correlation_path (str, optional): Path to save the rank correlation table as a CSV file.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Two DataFrames:
+            - A wide table with the country, '<label>_rank' for every impact, '<col>_rank' for every
+              indicator and '<label>_vs_<col>' rank differences (dataRating - impactRating).
+            - A table of Spearman and Kendall rank correlations for every (impact, indicator) pair.
+    """
+    data_cols = ['pop', 'gdp', 'pc'] if data_cols is None else list(data_cols)
+    keys, values, ranks = _rank_matrix([*impacts.values(), *[(data_df, data_col) for data_col in data_cols]])
+    rows = keys.isin(data_df['country']) & ~np.isnan(ranks[:, :len(impacts)]).all(axis=1)
+
+    result = pd.DataFrame({'country': keys[rows]}).join(
+        pd.DataFrame(ranks[rows], columns=[f'{label}_rank' for label in [*impacts, *data_cols]]))
+    correlations = []
+    for i, label in enumerate(impacts):
+        for j, data_col in enumerate(data_cols, start=len(impacts)):
+            result[f'{label}_vs_{data_col}'] = ranks[rows, j] - ranks[rows, i]
+            correlations.append((label, data_col, *_rank_correlations(values[rows, i], values[rows, j])))
+    correlations = pd.DataFrame(correlations, columns=['impact', 'data', 'spearman', 'kendall', 'n'])
+    correlations = correlations[['impact', 'data', 'n', 'spearman', 'kendall']]
+
+    if output_path is not None:
+        result.to_csv(output_path, index=False)
+    else:
+        result.to_csv("out/task2_rank_comparison.csv", index=False)
+    if correlation_path is not None:
+        correlations.to_csv(correlation_path, index=False)
+    else:
+        correlations.to_csv("out/task2_rank_correlations.csv", index=False)
+
+    return result, correlations
+
 def region_genre_analysis(dc: IMDbData, qm: str, output_path=None, **kwargs) -> pd.DataFrame:
     """
     Analyzes region and genre data based on a specified quality measure.
@@ -337,21 +592,26 @@ def region_genre_analysis(dc: IMDbData, qm: str, output_path=None, **kwargs) ->
         **kwargs: Additional keyword arguments for the quality measure function.
     
     Returns:
-        pd.DataFrame: The resulting DataFrame of the analysis.
+        pd.DataFrame: The resulting DataFrame of the analysis. For sampled data standard errors are given
+        in the '<qm>_se' column.
     """
-    title2info = dc.title_info_table()
-    title2reg = dc.title_region_table()
-    title2info = title2info[title2info['genres'] != "\\N"]
-    title2info = title2info.assign(genre=title2info['genres'].str.split(',')).explode('genre').reset_index(drop=True)
-    merged = pd.merge(title2reg, title2info, on="tconst")
-    final_table = _apply_measure(merged, ['region', 'numVotes', 'averageRating', 'genre'], ['region', 'genre'], qm, **kwargs)
-    final_table = _region_country_change(final_table)
+    if hasattr(dc, 'region_statistics') and _statistics_measure(qm, kwargs) is not None:
+        final_table = measure_from_statistics(dc.region_statistics(by_genre=True), qm, **kwargs)
+    else:
+        title2info = dc.title_info_table(['tconst', 'genres', 'averageRating', 'numVotes'])
+        title2reg = dc.title_region_table()
+        title2info = title2info[title2info['genres'] != "\\N"]
+        title2info = title2info.assign(genre=title2info['genres'].str.split(',')).explode('genre').reset_index(drop=True)
+        merged = pd.merge(title2reg, title2info, on="tconst")
+        final_table = _apply_measure(merged, ['region', 'numVotes', 'averageRating', 'genre'], ['region', 'genre'], qm, **kwargs)
+        final_table = _with_sampling_error(final_table, merged, ['region', 'genre'], dc, qm, **kwargs)
+        final_table = region_country_change(final_table)
     result = final_table.sort_values(qm, ascending=False)
 
     if output_path is not None:
         result.to_csv(output_path, index=False)
     else:
-        result.to_csv(f"out/task3_{qm}_country_vs_genre.csv", index=False)
+        result.to_csv(DEFAULT_OUTPUT_PATHS['region_genre_analysis'].format(qm=qm), index=False)
 
     return result
 
@@ -388,21 +648,112 @@ def make_comparison(coun_vs_gen: pd.DataFrame, country_set: set[str] | None, gen
 
     return coun_vs_gen
 
-# Helper function to apply a quality measure
-def _apply_measure(df:pd.DataFrame, col_taken: list[str],  group_by: list[str], qm: str, **kwargs) -> pd.DataFrame:
-    fun = QUALITY_MEASURES[qm] if isinstance(qm, str) else qm
-    applied = df[col_taken].groupby(group_by, as_index=False).apply(fun, **kwargs)
-    applied.columns = [qm if col is None else col for col in applied.columns]
-    return applied
+def file_fingerprint(path: str) -> tuple[str, int, int]:
+    """
+    Identifies a file by its path, size and modification time.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        tuple[str, int, int]: The absolute path, the size in bytes and the modification time in nanoseconds.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+def join_title_info(basic_info: pd.DataFrame, ratings_info: pd.DataFrame, prod_type: str, in_years: tuple[int, int]) \
+                                                                        -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Joins basic and ratings info of titles of a given type from given years.
+
+    Args:
+        basic_info (pd.DataFrame): Basic info with columns 'tconst', 'titleType' and 'startYear'.
+        ratings_info (pd.DataFrame): Ratings info with columns 'tconst', 'numVotes' and 'averageRating'.
+        prod_type (str): The type of titles to filter (e.g., 'movie', 'tvEpisode', 'short', 'videoGame').
+        in_years (tuple[int, int]): Tuple of ints representing start and end year for filtering titles.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The joined info of the filtered titles and the filtered titles (tconst).
+    """
+    basic_info_type = basic_info[basic_info['titleType'] == prod_type]
+    # startYear is parsed as int or str depending on the chunk of a file, so it is compared as str
+    in_type = basic_info_type[basic_info_type['startYear'].astype(str).isin([str(x) for x in range(in_years[0], in_years[1]+1)])]
+    in_type_filter = in_type['tconst']
+    merged_info = pd.merge(basic_info, ratings_info, on='tconst')
+    title2info = pd.merge(in_type_filter, merged_info, on='tconst')
+    return title2info, in_type_filter
+
+def join_title_region(akas_info: pd.DataFrame, in_type: pd.DataFrame) -> pd.DataFrame:
+    """
+    Maps titles to regions in which their original title is used.
+
+    Args:
+        akas_info (pd.DataFrame): Akas info with columns 'titleId', 'title', 'region' and 'isOriginalTitle'.
+        in_type (pd.DataFrame): Titles (tconst) to map.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the mapping of titles (tconst) to regions.
+    """
+    akas_info = akas_info.rename(columns={'titleId': "tconst"})
+    akas_in_type = pd.merge(in_type, akas_info, on='tconst')
+    is_original = pd.to_numeric(akas_in_type['isOriginalTitle'], errors='coerce')
+    org_titles = akas_in_type[is_original == 1][['tconst', 'title']]
+    prepared_akas = akas_in_type[is_original == 0][["tconst", 'title', 'region']]
+    title2reg = pd.merge(org_titles, prepared_akas, on=["title", "tconst"])[["tconst", 'region']]
+    return title2reg
+
+def region_statistics_from_tables(title2info: pd.DataFrame, title2reg: pd.DataFrame, by_genre=False) -> pd.DataFrame:
+    """
+    Computes sufficient statistics of titles' ratings for each region (and genre) from title tables.
+
+    Args:
+        title2info (pd.DataFrame): Title info with columns 'tconst', 'averageRating', 'numVotes' (and 'genres').
+        title2reg (pd.DataFrame): Mapping of titles (tconst) to regions.
+        by_genre (bool, optional): Whether to group by genre in addition to region.
+
+    Returns:
+        pd.DataFrame: The DataFrame with 'region' (and 'genre') columns and columns listed in STATISTICS.
+    """
+    group_by = ['region']
+    if by_genre:
+        group_by.append('genre')
+        title2info = title2info[title2info['genres'] != "\\N"]
+        title2info = title2info.assign(genre=title2info['genres'].str.split(',')).explode('genre')
+    title2info = title2info[['tconst', *group_by[1:], 'averageRating', 'numVotes']]
+    merged = pd.merge(title2reg, title2info, on="tconst")
+    rating = merged['averageRating']
+    stats = merged[group_by].assign(
+        count=1,
+        sumVotes=merged['numVotes'],
+        sumRating=rating,
+        sumRatingVotes=rating * merged['numVotes'],
+        flops=(rating < FLOP_TH).astype('int64'),
+        masterpieces=(rating > MASTERPIECE_TH).astype('int64'))
+    return stats.groupby(group_by, as_index=False)[STATISTICS].sum()
+
+def region_country_change(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Maps region codes to country names.
+
+    Args:
+        df (pd.DataFrame): The DataFrame with the 'region' column, it is not modified.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the 'region' column replaced by the 'country' column.
+    """
+    return df.assign(region=df['region'].map(code_to_country)).rename(columns={'region':'country'})
 
-# Helper function to map region codes to country names
-def _region_country_change(df: pd.DataFrame) -> pd.DataFrame:
-    df['region'] = df['region'].map(_code_to_country)
-    df.rename(columns={'region':'country'}, inplace=True)
-    return df
+def code_to_country(x: str) -> str:
+    """
+    Converts an ISO 3166 country code to the country name.
 
-# Helper function to convert country codes to country names
-def _code_to_country(x: str) -> str:
+    Args:
+        x (str): The alpha-2, alpha-3 or alpha-4 code.
+
+    Returns:
+        str: The country name, '*' followed by the name for historical countries, '**' followed by the code
+        for user-assigned codes (e.g. XK) and '' for unknown codes.
+    """
     size = len(x)
     kwargs = {f"alpha_{size}": x}
 
@@ -428,6 +779,186 @@ def _code_to_country(x: str) -> str:
 
     return ""
 
+def line_ranges(path, n_ranges: int, delim: str = '\t') -> tuple[list[str], list[tuple[int, int]]]:
+    """
+    Splits a file after its header into byte ranges ending at line boundaries. Ranges can be parsed
+    independently with read_csv_range only when fields are not quoted (quoting=csv.QUOTE_NONE).
+
+    Args:
+        path (str): Path to an uncompressed file.
+        n_ranges (int): Maximal number of ranges.
+        delim (str, optional): Delimiter used in the file.
+
+    Returns:
+        tuple[list[str], list[tuple[int, int]]]: Column names from the header and (start, end) of non-empty ranges.
+    """
+    with open(path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        header_end = mapped.find(b'\n') + 1
+        names = mapped[:header_end].decode().rstrip('\r\n').split(delim)
+        size = len(mapped)
+        bounds = [header_end]
+        for i in range(1, n_ranges):
+            line_end = mapped.find(b'\n', max(bounds[-1], header_end + (size - header_end) * i // n_ranges))
+            bounds.append(size if line_end == -1 else line_end + 1)
+        bounds.append(size)
+    return names, [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if start < end]
+
+def read_csv_range(path, byte_range: tuple[int, int], read_kwargs: dict) -> pd.DataFrame:
+    """
+    Parses a byte range of a file returned by line_ranges.
+
+    Args:
+        path (str): Path to the file.
+        byte_range (tuple[int, int]): Start and end of the range.
+        read_kwargs (dict): Keyword arguments of pd.read_csv, with header=None and names of columns.
+
+    Returns:
+        pd.DataFrame: The parsed rows.
+    """
+    start, end = byte_range
+    with open(path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = io.BytesIO(mapped[start:end])
+    return pd.read_csv(data, **read_kwargs)
+
+def spawn_process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers are spawned, forking a process with running threads
+    (e.g. prefetching IMDbData or running stages of the demo) is unsafe.
+
+    Args:
+        max_workers (int, optional): Number of worker processes, the number of CPUs by default.
+
+    Returns:
+        ProcessPoolExecutor: The process pool.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+# Helper function building the tables of IMDbData in the background, a failure is kept by the future of the prefetch
+def _prefetch_tables(dc: IMDbData, columns: list[str] | None):
+    dc.title_info_table(columns)
+    dc.title_region_table()
+
+# Helper function to find the function computing a quality measure from sufficient statistics
+def _statistics_measure(qm: str, kwargs: dict):
+    return STATISTICS_MEASURES.get((qm, *sorted(kwargs.items())))
+
+# Helper function to check whether a file is a large uncompressed file which can be split into byte ranges
+def _is_splittable(file) -> bool:
+    if not isinstance(file, (str, os.PathLike)) or str(file).lower().endswith(COMPRESSED_SUFFIXES):
+        return False
+    return os.path.isfile(file) and os.path.getsize(file) >= PARALLEL_PARSE_MIN_BYTES
+
+# Helper function to parse byte ranges of a file aligned to line boundaries in worker processes. Parsed rows
+# are pickled back to this process, so for text columns the speedup is bounded by their transfer
+def _parallel_read_csv(path, workers: int, read_kwargs: dict) -> pd.DataFrame:
+    names, ranges = line_ranges(path, workers, read_kwargs['delimiter'])
+    if not ranges:
+        return pd.read_csv(path, **read_kwargs)
+
+    range_kwargs = {**read_kwargs, 'header': None, 'names': names}
+    with spawn_process_pool(len(ranges)) as executor:
+        frames = list(executor.map(read_csv_range, [path] * len(ranges), ranges, [range_kwargs] * len(ranges)))
+    return pd.concat(frames, ignore_index=True)
+
+# Helper function to rescale totals and add standard errors of a measure computed on sampled data
+def _with_sampling_error(applied: pd.DataFrame, df: pd.DataFrame, group_by: list[str], dc: IMDbData, qm: str,
+                         **kwargs) -> pd.DataFrame:
+    fraction = getattr(dc, 'sample_fraction', None)
+    if fraction is None:
+        return applied
+    errors = _standard_errors(df, group_by, qm, fraction, **kwargs)
+    result = pd.merge(applied, errors, on=group_by, how='left')
+    if qm in TOTAL_MEASURES:
+        result[qm] = result[qm] / fraction
+    return result
+
+# Helper function to compute standard errors of a measure per group of a Bernoulli sample of titles
+def _standard_errors(df: pd.DataFrame, group_by: list[str], qm: str, fraction: float, **kwargs) -> pd.DataFrame:
+    groups = df[group_by]
+    if qm == 'weighted_mean':
+        y = df[kwargs['data']] * df[kwargs['weight']]
+        w = df[kwargs['weight']]
+        sums = groups.assign(n=1, y=y, w=w, yy=y*y, yw=y*w, ww=w*w).groupby(group_by).sum()
+        ratio = sums['y'] / sums['w']
+        residuals = sums['yy'] - 2*ratio*sums['yw'] + ratio*ratio*sums['ww']
+        variance = residuals / (sums['w']**2) * sums['n'] / (sums['n'] - 1)
+    elif qm in QUALITY_MEASURES:
+        x = df[kwargs['col']]
+        z = {'sum_votes': x, 'mean': x, 'flop_prob': x < FLOP_TH, 'masterpiece_prob': x > MASTERPIECE_TH,
+             'two-sided': (x > MASTERPIECE_TH).astype(int) - (x < FLOP_TH).astype(int)}[qm].astype(float)
+        sums = groups.assign(n=1, z=z, zz=z*z).groupby(group_by).sum()
+        if qm in TOTAL_MEASURES:
+            variance = sums['zz'] / fraction**2
+        else:
+            variance = (sums['zz'] - sums['z']**2 / sums['n']) / (sums['n'] - 1) / sums['n']
+    else:
+        return groups.drop_duplicates().assign(**{f'{qm}_se': np.nan})
+    with np.errstate(invalid='ignore', divide='ignore'):
+        errors = np.sqrt((1 - fraction) * variance.clip(lower=0))
+    return errors.rename(f'{qm}_se').reset_index()
+
+# Helper function to apply a quality measure
+def _apply_measure(df:pd.DataFrame, col_taken: list[str],  group_by: list[str], qm: str, **kwargs) -> pd.DataFrame:
+    if isinstance(qm, str) and qm in MEASURE_TERMS:
+        numerator, denominator = MEASURE_TERMS[qm](df, **kwargs)
+        sums = df[group_by].assign(numerator=numerator, denominator=denominator if denominator is not None else 1) \
+            .groupby(group_by, as_index=False).sum()
+        value = sums['numerator'] if denominator is None else sums['numerator'] / sums['denominator']
+        return sums[group_by].assign(**{qm: value})
+    fun = QUALITY_MEASURES[qm] if isinstance(qm, str) else qm
+    applied = df[col_taken].groupby(group_by, as_index=False).apply(fun, **kwargs)
+    applied.columns = [qm if col is None else col for col in applied.columns]
+    return applied
+
+# Helper function to select rows with the largest values of a column by a permutation instead of a sorted copy
+def _top_rows(df: pd.DataFrame, col: str, n: int | None = None) -> pd.DataFrame:
+    order = np.argsort(-df[col].to_numpy(dtype=float), kind='stable')
+    return df.iloc[order[:n]]
+
+# Helper function to compute best values and dense ranks of (DataFrame, column) pairs keyed by country
+def _rank_matrix(columns: list[tuple[pd.DataFrame, str]]) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    keys = pd.Index(pd.unique(np.concatenate([df['country'].to_numpy(dtype=object) for df, _ in columns])))
+    values = np.full((len(keys), len(columns)), -np.inf)
+    ranks = np.full((len(keys), len(columns)), np.inf)
+    for i, (df, col) in enumerate(columns):
+        codes = keys.get_indexer(df['country'])
+        col_values = df[col].to_numpy(dtype=float)
+        np.fmax.at(values[:, i], codes, col_values)
+        np.fmin.at(ranks[:, i], codes, _dense_rank(col_values))
+    values[np.isinf(values)] = np.nan
+    ranks[np.isinf(ranks)] = np.nan
+    return keys, values, ranks
+
+# Helper function to compute descending dense ranks (NaN values stay unranked)
+def _dense_rank(values: np.ndarray) -> np.ndarray:
+    ranks = np.full(len(values), np.nan)
+    known = ~np.isnan(values)
+    uniques, inverse = np.unique(values[known], return_inverse=True)
+    ranks[known] = len(uniques) - inverse
+    return ranks
+
+# Helper function to compute Spearman and Kendall (tau-b) rank correlations of paired values
+def _rank_correlations(x: np.ndarray, y: np.ndarray) -> tuple[float, float, int]:
+    known = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[known], y[known]
+    size = len(x)
+    if size < 2:
+        return np.nan, np.nan, size
+
+    rank_x = pd.Series(x).rank().to_numpy()
+    rank_y = pd.Series(y).rank().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spearman = np.corrcoef(rank_x, rank_y)[0, 1]
+
+        sign_x = np.sign(x[:, None] - x[None, :])
+        sign_y = np.sign(y[:, None] - y[None, :])
+        concordance = (sign_x * sign_y).sum() / 2
+        untied_x = np.count_nonzero(sign_x) / 2
+        untied_y = np.count_nonzero(sign_y) / 2
+        kendall = concordance / np.sqrt(untied_x * untied_y)
+    return float(spearman), float(kendall), size
+
 # Helper function to convert string to integer
 def _str_to_int(x):
     try:
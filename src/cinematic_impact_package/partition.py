@@ -0,0 +1,185 @@
+"""
+This module provides a partitioned execution mode for the region analyses from lib.py. Worker
+processes parse line-aligned byte ranges of the input files and hash-partition their rows by title
+into shards spilled to local disk, then every shard is joined and aggregated in a worker process
+and the decomposable aggregates are merged.
+"""
+
+import csv
+import os
+import tempfile
+from math import ceil
+import numpy as np
+import pandas as pd
+from cinematic_impact_package.lib import STATISTICS, IMDbData, measure_from_statistics, join_title_info, \
+    join_title_region, region_statistics_from_tables, line_ranges, read_csv_range, spawn_process_pool
+
+# (name, key column, used columns) of every input file, in the order of IMDbData data_paths
+SOURCES = (
+    ('basics', 'tconst', ['tconst', 'titleType', 'startYear']),
+    ('akas', 'titleId', ['titleId', 'title', 'region', 'isOriginalTitle']),
+    ('ratings', 'tconst', ['tconst', 'numVotes', 'averageRating'])
+)
+
+# Columns of input files read only when statistics are grouped by genre
+GENRE_COLUMNS = {'basics': ['genres']}
+
+# Estimated ratio of the memory used while parsing or joining rows to the size of the rows themselves
+JOIN_OVERHEAD = 3
+
+# Number of rows read to estimate the size of a file loaded into memory
+SAMPLE_ROWS = 10000
+
+class Partitioner:
+    """
+    Executes region analyses of IMDb files using hash partitioning of titles.
+
+    Methods:
+        region_statistics(dc, by_genre): Returns the same statistics as lib.region_statistics.
+        impact(dc, qm, by_genre, **kwargs): Returns the strong impact of countries (or the region-genre analysis).
+    """
+    def __init__(self, n_shards: int | None = None, memory_limit: int | None = None, max_workers: int | None = None,
+                 spill_dir: str | None = None):
+        """
+        Initializes the Partitioner.
+
+        Args:
+            n_shards (int, optional): Number of shards, the number of workers by default. With memory_limit set
+                it is increased when needed, so that shards processed concurrently fit into the limit.
+            memory_limit (int, optional): Memory budget in bytes. When set files are split into more byte
+                ranges than workers, so that ranges parsed concurrently fit into the limit.
+            max_workers (int, optional): Number of worker processes, the number of CPUs by default.
+            spill_dir (str, optional): Directory in which shards are stored, system temporary by default.
+        """
+        self.max_workers = max_workers or os.cpu_count()
+        self.n_shards = n_shards or self.max_workers
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+
+    def region_statistics(self, dc: IMDbData, by_genre=False) -> pd.DataFrame:
+        """
+        Computes the same statistics as lib.region_statistics using hash partitioning of titles.
+
+        Args:
+            dc (IMDbData): An instance of the IMDbData, only its files and parameters are used, so it does
+                not have to be loaded.
+            by_genre (bool, optional): Whether to group by genre in addition to region.
+
+        Returns:
+            pd.DataFrame: The DataFrame with 'region' (and 'genre') columns and columns listed in STATISTICS.
+        """
+        if dc.sample_fraction is not None:
+            raise ValueError('Partitioned execution does not support sampled data.')
+        sources = _sources(by_genre)
+        n_shards, n_ranges = self.n_shards, [self.max_workers] * len(sources)
+        if self.memory_limit is not None:
+            n_shards, n_ranges = self._plan_partitions(dc.data_paths, sources)
+
+        with tempfile.TemporaryDirectory(dir=self.spill_dir) as tmp_dir, \
+                spawn_process_pool(self.max_workers) as executor:
+            shards = _partition_files(executor, dc.data_paths, sources, n_ranges, (n_shards, tmp_dir))
+            stats = list(executor.map(_shard_statistics, shards, [sources] * n_shards, [dc.prod_type] * n_shards,
+                                      [dc.in_years] * n_shards, [by_genre] * n_shards))
+
+        stats = pd.concat([shard_stats for shard_stats in stats if len(shard_stats)] or stats[:1], ignore_index=True)
+        group_by = [col for col in stats.columns if col not in STATISTICS]
+        return stats.groupby(group_by, as_index=False)[STATISTICS].sum()
+
+    def impact(self, dc: IMDbData, qm: str, by_genre=False, **kwargs) -> pd.DataFrame:
+        """
+        Computes the strong impact of countries (or the region-genre analysis when by_genre is set)
+        using hash partitioning of titles.
+
+        Args:
+            dc (IMDbData): An instance of the IMDbData, it does not have to be loaded.
+            qm (str): The quality measure to use for ranking countries.
+            by_genre (bool, optional): Whether to group by genre in addition to country.
+            **kwargs: Additional keyword arguments for the quality measure function.
+
+        Returns:
+            pd.DataFrame: The strong impact of countries, or countries and genres sorted by the quality measure.
+        """
+        result = measure_from_statistics(self.region_statistics(dc, by_genre), qm, **kwargs)
+        if by_genre:
+            result = result.sort_values(qm, ascending=False)
+        return result
+
+    def _plan_partitions(self, data_paths: tuple[str, str, str], sources: list[tuple]) -> tuple[int, list[int]]:
+        n_ranges = []
+        total_memory = 0
+        for path, (_, _, usecols) in zip(data_paths, sources):
+            sample = pd.read_csv(path, delimiter='\t', usecols=usecols, nrows=SAMPLE_ROWS, quoting=csv.QUOTE_NONE)
+            file_memory = sample.memory_usage(deep=True).sum() / max(1, len(sample)) * _estimate_rows(path)
+            total_memory += file_memory
+            n_ranges.append(max(self.max_workers, ceil(JOIN_OVERHEAD * file_memory * self.max_workers
+                                                       / self.memory_limit)))
+        n_shards = max(self.n_shards, ceil(JOIN_OVERHEAD * total_memory * self.max_workers / self.memory_limit))
+        return n_shards, n_ranges
+
+
+# Helper function returning SOURCES with the columns used by an analysis
+def _sources(by_genre: bool) -> list[tuple[str, str, list[str]]]:
+    return [(name, key, usecols + (GENRE_COLUMNS.get(name, []) if by_genre else []))
+            for name, key, usecols in SOURCES]
+
+# Helper function estimating the number of rows in a file from the length of its first lines
+def _estimate_rows(path: str) -> int:
+    with open(path, 'rb') as file:
+        lines = [line for _, line in zip(range(SAMPLE_ROWS), file)]
+    if not lines:
+        return 0
+    return ceil(os.path.getsize(path) * len(lines) / sum(len(line) for line in lines))
+
+# Helper function assigning rows to shards by hash of their title
+def _shard_codes(keys: pd.Series, n_shards: int) -> np.ndarray:
+    return pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy() % n_shards
+
+# Helper function splitting all files into shards in worker processes, every shard maps source names
+# to paths of its parts, spilled to the directory of the shards
+def _partition_files(executor, data_paths: tuple[str, str, str], sources: list[tuple], n_ranges: list[int],
+                     shard_layout: tuple[int, str]) -> list[dict[str, list[str]]]:
+    shards = [{name: [] for name, _, _ in sources} for _ in range(shard_layout[0])]
+    for path, source, file_ranges in zip(data_paths, sources, n_ranges):
+        for range_parts in _partition_file(executor, path, source, file_ranges, shard_layout):
+            for shard, part_path in range_parts.items():
+                shards[shard][source[0]].append(part_path)
+    return shards
+
+# Helper function splitting a file into byte ranges partitioned by worker processes, returns paths
+# of parts of every range by shard
+def _partition_file(executor, path: str, source: tuple[str, str, list[str]], n_ranges: int,
+                    shard_layout: tuple[int, str]) -> list[dict[int, str]]:
+    print(f"Partitioning {path}...")
+    n_shards, spill_dir = shard_layout
+    names, ranges = line_ranges(path, n_ranges)
+    tasks = [(path, byte_range, names, os.path.join(spill_dir, f"{source[0]}_{i}")) for i, byte_range in
+             enumerate(ranges)]
+    parts = list(executor.map(_partition_range, tasks, [source] * len(tasks), [n_shards] * len(tasks)))
+    print("Partitioned")
+    return parts
+
+# Helper function parsing a byte range of a file and spilling its rows by shard, run in worker processes
+def _partition_range(task: tuple, source: tuple[str, str, list[str]], n_shards: int) -> dict[int, str]:
+    path, byte_range, names, spill_prefix = task
+    _, key, usecols = source
+    rows = read_csv_range(path, byte_range, {'delimiter': '\t', 'header': None, 'names': names, 'usecols': usecols,
+                                             'quoting': csv.QUOTE_NONE})
+    parts = {}
+    for shard, part in rows.groupby(_shard_codes(rows[key], n_shards)):
+        parts[int(shard)] = f"{spill_prefix}_{shard}.pkl"
+        part.to_pickle(parts[int(shard)])
+    return parts
+
+# Helper function loading a shard of a file from its parts
+def _read_parts(parts: list[str], usecols: list[str]) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame({col: pd.Series(dtype=object) for col in usecols})
+    return pd.concat([pd.read_pickle(part) for part in parts], ignore_index=True)
+
+# Helper function computing statistics of a single shard, run in worker processes
+def _shard_statistics(shard: dict[str, list[str]], sources: list[tuple], prod_type: str, in_years: tuple[int, int],
+                      by_genre: bool) -> pd.DataFrame:
+    basic_info, akas_info, ratings_info = [_read_parts(shard[name], usecols) for name, _, usecols in sources]
+    title2info, in_type = join_title_info(basic_info, ratings_info, prod_type, in_years)
+    title2reg = join_title_region(akas_info, in_type)
+    return region_statistics_from_tables(title2info, title2reg, by_genre)
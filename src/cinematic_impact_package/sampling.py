@@ -0,0 +1,98 @@
+"""
+This module provides hash sampling of lines of delimited files used by lib.load_data. A line is
+kept when the hash of its first column falls into the sampled fraction, so files keyed by the same
+ids (e.g. titles of the IMDb basics, ratings and akas files) keep the same ids.
+"""
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import numpy as np
+
+# Suffixes of compressed files, which cannot be split into byte ranges
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.zip', '.xz', '.zst', '.tar')
+
+# Functions opening compressed files which can be sampled, by suffix
+SAMPLED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+# Size of blocks of a file filtered at once
+SAMPLE_BLOCK_BYTES = 16 * 2**20
+
+def sample_lines(file, delim: str, fraction: float, seed: int) -> io.BytesIO:
+    """
+    Keeps the header and the lines of a file whose first column hashes into the sampled fraction.
+
+    Lines are filtered in blocks with NumPy, so the cost of sampling is reading the file and hashing
+    the first column of every line, only the parsing of the result is proportional to the fraction.
+
+    Args:
+        file (str | file object): Path to the file (.gz, .bz2 and .xz files are decompressed) or a file object.
+        delim (str): Single-character delimiter of columns.
+        fraction (float): Fraction of keys to keep, in (0, 1].
+        seed (int): Seed of the hash, equal seeds keep equal keys in every file.
+
+    Returns:
+        io.BytesIO: The kept lines.
+    """
+    sep = delim.encode()
+    if len(sep) != 1:
+        raise ValueError('Sampling requires a single-byte delimiter.')
+    threshold = int(fraction * 2**32)
+    kept = io.BytesIO()
+    with _open_binary(file) as handle:
+        kept.write(_as_bytes(handle.readline()))
+        rest = b''
+        while block := _as_bytes(handle.read(SAMPLE_BLOCK_BYTES)):
+            data = rest + block
+            cut = data.rfind(b'\n') + 1
+            kept.write(_sampled_block(data[:cut], sep[0], threshold, seed))
+            rest = data[cut:]
+    if rest:
+        kept.write(_sampled_block(rest + b'\n', sep[0], threshold, seed))
+    kept.seek(0)
+    return kept
+
+# Helper function to keep complete lines of a block whose first column hashes below the threshold
+def _sampled_block(block: bytes, sep: int, threshold: int, seed: int) -> bytes:
+    data = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(data == ord('\n')) + 1
+    starts = np.concatenate(([0], ends))[:-1]
+    keep = (_key_hashes(data, starts, sep, seed) >> np.uint64(32)) < threshold
+    return data[np.repeat(keep, ends - starts)].tobytes()
+
+# Helper function to hash the first column of lines starting at starts (FNV-1a with a splitmix64 finalizer),
+# all lines advance by one byte per step until they reach the delimiter or the end of the line
+def _key_hashes(data: np.ndarray, starts: np.ndarray, sep: int, seed: int) -> np.ndarray:
+    hashes = np.full(len(starts), (0xCBF29CE484222325 ^ seed * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF, dtype=np.uint64)
+    active = np.ones(len(starts), dtype=bool)
+    position = starts.copy()
+    step = np.empty_like(hashes)
+    while active.any():
+        byte = data.take(position, mode='clip')
+        active &= (byte != sep) & (byte != ord('\n'))
+        np.bitwise_xor(hashes, byte, out=step)
+        np.multiply(step, np.uint64(0x100000001B3), out=step)
+        np.copyto(hashes, step, where=active)
+        position += 1
+    for shift, factor in [(30, 0xBF58476D1CE4E5B9), (27, 0x94D049BB133111EB)]:
+        hashes = (hashes ^ (hashes >> np.uint64(shift))) * np.uint64(factor)
+    return hashes ^ (hashes >> np.uint64(31))
+
+# Helper function to open a path (decompressed by its suffix) or a file object for reading
+def _open_binary(file):
+    if not isinstance(file, (str, os.PathLike)):
+        return contextlib.nullcontext(file)
+    suffix = os.path.splitext(str(file))[1].lower()
+    if suffix in SAMPLED_OPENERS:
+        return SAMPLED_OPENERS[suffix](file, 'rb')
+    if suffix in COMPRESSED_SUFFIXES:
+        raise ValueError(f'Sampling of {suffix} files is not supported, supported compressions: '
+                         f'{", ".join(SAMPLED_OPENERS)}.')
+    return open(file, 'rb')
+
+# Helper function to encode text read from a file object opened in text mode
+def _as_bytes(data) -> bytes:
+    return data.encode() if isinstance(data, str) else data
@@ -0,0 +1,158 @@
+"""
+This module provides a small dependency-graph task scheduler used to run the analysis stages
+from lib.py. Each stage declares the stages whose outputs it consumes, intermediate results are
+shared between stages instead of being recomputed, and independent stages run concurrently in
+threads. Threads overlap file reading and the parts of pandas and NumPy which release the GIL.
+Quality measures in lib.py are computed with grouped sums instead of Python functions applied to
+every group, so analysis stages run little Python code, hashing of string keys still holds the GIL.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class Stage:
+    """
+    A single node of the task graph.
+
+    Attributes:
+        name (str): Unique name of the stage, its output is stored under this name.
+        func (Callable): Function computing the stage output.
+        inputs (tuple[str, ...]): Names of the stages whose outputs are passed positionally to func.
+        kwargs (dict): Additional keyword arguments passed to func.
+        duration (float | None): Measured wall time of the stage in seconds (None before run).
+    """
+    name: str
+    func: Callable
+    inputs: tuple[str, ...] = ()
+    kwargs: dict = field(default_factory=dict)
+    duration: float | None = None
+
+    def __call__(self, *args) -> tuple[Any, float]:
+        start = time.perf_counter()
+        output = self.func(*args, **self.kwargs)
+        return output, time.perf_counter() - start
+
+
+class TaskGraph:
+    """
+    A directed acyclic graph of stages executed in a thread pool.
+
+    Methods:
+        add(name, func, inputs, **kwargs): Adds a stage to the graph.
+        run(max_workers, executor_cls): Executes all stages respecting their dependencies.
+        critical_path(): Returns the longest chain of dependent stages of the last run.
+    """
+    def __init__(self):
+        self.stages: dict[str, Stage] = {}
+        self.results: dict[str, Any] = {}
+
+    def add(self, name: str, func: Callable, inputs: tuple[str, ...] = (), **kwargs) -> 'TaskGraph':
+        """
+        Adds a stage to the graph.
+
+        Args:
+            name (str): Unique name of the stage.
+            func (Callable): Function computing the stage output.
+            inputs (tuple[str, ...], optional): Names of the stages whose outputs are passed to func.
+            **kwargs: Additional keyword arguments for func.
+
+        Returns:
+            TaskGraph: The graph itself, so calls can be chained.
+        """
+        if name in self.stages:
+            raise ValueError(f'Stage {name} is already defined.')
+        self.stages[name] = Stage(name, func, tuple(inputs), kwargs)
+        return self
+
+    def run(self, max_workers: int | None = None, executor_cls=ThreadPoolExecutor) -> dict[str, Any]:
+        """
+        Executes all stages, submitting every stage as soon as all of its inputs are available.
+
+        Args:
+            max_workers (int, optional): Maximal number of concurrently running stages.
+            executor_cls (optional): Executor class used to run stages (ThreadPoolExecutor by default). Stages
+                are submitted as callables, so a process pool requires picklable functions, inputs and outputs,
+                which e.g. IMDbData (holding locks) is not.
+
+        Returns:
+            dict[str, Any]: Mapping of stage names to their outputs.
+        """
+        order = self._topological_order()
+        pending = {name: set(self.stages[name].inputs) for name in order}
+        self.results = {}
+        for stage in self.stages.values():
+            stage.duration = None
+
+        with executor_cls(max_workers=max_workers) as executor:
+            running = {}
+            while pending or running:
+                ready = [name for name in order if name in pending and not pending[name]]
+                for name in ready:
+                    del pending[name]
+                    stage = self.stages[name]
+                    args = [self.results[dep] for dep in stage.inputs]
+                    running[executor.submit(stage, *args)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.results[name], self.stages[name].duration = future.result()
+                    for deps in pending.values():
+                        deps.discard(name)
+        return self.results
+
+    def critical_path(self) -> tuple[list[str], float]:
+        """
+        Returns the critical path of the last run, i.e. the chain of dependent stages
+        with the largest total duration.
+
+        Returns:
+            tuple[list[str], float]: Names of stages on the critical path and its total duration in seconds.
+        """
+        finish = {}
+        previous = {}
+        for name in self._topological_order():
+            stage = self.stages[name]
+            if stage.duration is None:
+                raise ValueError('Critical path is available only after the graph has been run.')
+            start = 0.0
+            previous[name] = None
+            for dep in stage.inputs:
+                if finish[dep] > start:
+                    start = finish[dep]
+                    previous[name] = dep
+            finish[name] = start + stage.duration
+
+        if not finish:
+            return [], 0.0
+        last = max(finish, key=finish.get)
+        path = []
+        node = last
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1], finish[last]
+
+    def _topological_order(self) -> list[str]:
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if name not in self.stages:
+                raise ValueError(f'Unknown stage {name} required by {path[-1]}.')
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle detected: {' -> '.join(path + [name])}.")
+            state[name] = 'visiting'
+            for dep in self.stages[name].inputs:
+                visit(dep, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
@@ -0,0 +1,223 @@
+"""
+This module provides a persistent, indexed SQLite store of IMDb and World Bank data and an
+IMDbData-compatible backend reading from it. Filters and grouped aggregations of the region
+analyses are pushed down to SQL, so an analysis reads only the indexed rows it needs.
+"""
+
+import argparse
+import csv
+import sqlite3
+import pandas as pd
+from cinematic_impact_package.arguments import add_data_arguments
+from cinematic_impact_package.lib import FLOP_TH, MASTERPIECE_TH, STATISTICS, load_data, geopolitical_data, \
+    join_title_region, file_fingerprint
+
+SCHEMA = [
+    'CREATE TABLE basics (tconst TEXT, titleType TEXT, startYear INTEGER, genres TEXT)',
+    'CREATE TABLE ratings (tconst TEXT, averageRating REAL, numVotes INTEGER)',
+    'CREATE TABLE title_region (tconst TEXT, region TEXT)',
+    'CREATE TABLE title_genre (tconst TEXT, genre TEXT)',
+    'CREATE TABLE geopolitical (country TEXT, pop REAL, gdp REAL, pc REAL)'
+]
+
+INDEXES = [
+    'CREATE UNIQUE INDEX basics_tconst ON basics (tconst)',
+    'CREATE INDEX basics_type_year ON basics (titleType, startYear)',
+    'CREATE UNIQUE INDEX ratings_tconst ON ratings (tconst)',
+    'CREATE INDEX title_region_tconst ON title_region (tconst)',
+    'CREATE INDEX title_region_region ON title_region (region)',
+    'CREATE INDEX title_genre_tconst ON title_genre (tconst)'
+]
+
+# Names of the tables of SCHEMA
+TABLES = ['basics', 'ratings', 'title_region', 'title_genre', 'geopolitical']
+
+# SQL expressions of the columns of the title info table
+INFO_COLUMNS = {
+    'tconst': 'b.tconst',
+    'titleType': 'b.titleType',
+    'startYear': 'CAST(b.startYear AS TEXT)',
+    'genres': 'b.genres',
+    'numVotes': 'r.numVotes',
+    'averageRating': 'r.averageRating'
+}
+
+# Filter of titles of a given type from given years, uses the basics_type_year index
+IN_TYPE = 'b.titleType = :prod_type AND b.startYear BETWEEN :start AND :end'
+
+def build_store(db_path: str, data_paths: tuple[str, str, str], geo_paths: tuple[str, str, str] | None = None):
+    """
+    Loads IMDb data (and optionally geopolitical data) into a new SQLite database.
+
+    Akas are stored already reduced to (title, region) pairs of titles whose original title
+    is used in the region, and genres of titles are stored split into separate rows. Tables of
+    a store already existing at db_path are dropped and loaded again.
+
+    Args:
+        db_path (str): Path to the SQLite database file to create or rebuild.
+        data_paths (tuple[str, str, str]): Tuple of path to data (basics_path, akas_path, ratings_path).
+        geo_paths (tuple[str, str, str], optional): Tuple of path to geopolitical data
+            (population_path, gdp_path, per_capita_path).
+    """
+    tables = _imdb_tables(data_paths)
+    if geo_paths is not None:
+        tables['geopolitical'] = geopolitical_data(*geo_paths)
+
+    with sqlite3.connect(db_path) as con:
+        for name in TABLES:
+            con.execute(f'DROP TABLE IF EXISTS {name}')
+        for statement in SCHEMA:
+            con.execute(statement)
+        for name, table in tables.items():
+            table.to_sql(name, con, if_exists='append', index=False, chunksize=100000)
+        for statement in INDEXES:
+            con.execute(statement)
+        con.execute('ANALYZE')
+    con.close()
+
+# Helper function loading IMDb files into DataFrames of the tables of the store
+def _imdb_tables(data_paths: tuple[str, str, str]) -> dict[str, pd.DataFrame]:
+    basics_path, akas_path, ratings_path = data_paths
+    basics = load_data(basics_path, usecols=['tconst', 'genres', 'titleType', 'startYear'], quoting=csv.QUOTE_NONE)
+    basics['startYear'] = pd.to_numeric(basics['startYear'], errors='coerce').astype('Int64')
+    ratings = load_data(ratings_path, usecols=['tconst', 'numVotes', 'averageRating'], quoting=csv.QUOTE_NONE)
+    akas = load_data(akas_path, usecols=['titleId', 'title', 'region', 'isOriginalTitle'], quoting=csv.QUOTE_NONE)
+    title2reg = join_title_region(akas, basics['tconst'])
+    del akas
+    genres = basics.loc[basics['genres'] != "\\N", ['tconst', 'genres']]
+    title2genre = genres.assign(genre=genres['genres'].str.split(',')).explode('genre')[['tconst', 'genre']]
+    return {'basics': basics[['tconst', 'titleType', 'startYear', 'genres']],
+            'ratings': ratings[['tconst', 'averageRating', 'numVotes']],
+            'title_region': title2reg, 'title_genre': title2genre}
+
+
+class SQLiteIMDbData:
+    """
+    An IMDbData-compatible class reading titles of a given type from given years from a SQLite store.
+
+    Methods:
+        title_info_table(columns): Returns the combined basic and ratings info table.
+        title_region_table(): Returns the information table about the region of origin.
+        region_statistics(by_genre): Returns sufficient statistics per region (and genre) computed in SQL.
+        geopolitical_table(): Returns the stored geopolitical data.
+        fingerprint(): Returns a tuple identifying the database file and parameters of the data.
+    """
+    def __init__(self, db_path: str, prod_type: str, in_years: tuple[int, int]):
+        """
+        Initializes the SQLiteIMDbData, no data is read until a table is requested.
+
+        Args:
+            db_path (str): Path to the SQLite database created by build_store.
+            prod_type (str): The type of titles to filter (e.g., 'movie', 'tvEpisode', 'short', 'videoGame').
+            in_years (tuple[int, int]): Tuple of ints representing start and end year for filtering titles.
+        """
+        self.db_path = db_path
+        self.params = {'prod_type': prod_type, 'start': in_years[0], 'end': in_years[1],
+                       'flop_th': FLOP_TH, 'masterpiece_th': MASTERPIECE_TH}
+
+    def title_info_table(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Returns the combined basic and ratings info table.
+
+        Args:
+            columns (list[str], optional): Columns of the table to select, all columns by default.
+
+        Returns:
+            pd.DataFrame: The combined data table.
+        """
+        columns = list(INFO_COLUMNS) if columns is None else columns
+        return self._query(f'''
+            SELECT {', '.join(f'{INFO_COLUMNS[col]} AS {col}' for col in columns)}
+            FROM basics b JOIN ratings r ON r.tconst = b.tconst
+            WHERE {IN_TYPE}''')
+
+    def title_region_table(self) -> pd.DataFrame:
+        """
+        Returns the information table about the region of origin.
+
+        Returns:
+            pd.DataFrame: The information table about the region of origin.
+        """
+        return self._query(f'''
+            SELECT tr.tconst, tr.region
+            FROM basics b JOIN title_region tr ON tr.tconst = b.tconst
+            WHERE {IN_TYPE}''')
+
+    def region_statistics(self, by_genre=False) -> pd.DataFrame:
+        """
+        Computes sufficient statistics of titles' ratings for each region (and genre) in SQL.
+
+        Args:
+            by_genre (bool, optional): Whether to group by genre in addition to region.
+
+        Returns:
+            pd.DataFrame: The DataFrame with 'region' (and 'genre') columns and columns listed in STATISTICS.
+        """
+        group_by = 'tr.region, tg.genre' if by_genre else 'tr.region'
+        genre_join = 'JOIN title_genre tg ON tg.tconst = b.tconst' if by_genre else ''
+        stats = self._query(f'''
+            SELECT {group_by},
+                   COUNT(*) AS count,
+                   SUM(r.numVotes) AS sumVotes,
+                   SUM(r.averageRating) AS sumRating,
+                   SUM(r.averageRating * r.numVotes) AS sumRatingVotes,
+                   SUM(r.averageRating < :flop_th) AS flops,
+                   SUM(r.averageRating > :masterpiece_th) AS masterpieces
+            FROM basics b
+            JOIN ratings r ON r.tconst = b.tconst
+            JOIN title_region tr ON tr.tconst = b.tconst
+            {genre_join}
+            WHERE {IN_TYPE} AND tr.region IS NOT NULL
+            GROUP BY {group_by}
+            ORDER BY {group_by}''')
+        return stats[[col for col in stats.columns if col not in STATISTICS] + STATISTICS]
+
+    def geopolitical_table(self) -> pd.DataFrame:
+        """
+        Returns the geopolitical data stored by build_store.
+
+        Returns:
+            pd.DataFrame: The geopolitical data with columns ['country', 'pop', 'gdp', 'pc'].
+        """
+        return self._query('SELECT country, pop, gdp, pc FROM geopolitical')
+
+    def fingerprint(self) -> tuple:
+        """
+        Returns a tuple identifying the database file (path, size, modification time) and the parameters of the data.
+
+        Returns:
+            tuple: The fingerprint of the data.
+        """
+        return (type(self).__name__, file_fingerprint(self.db_path), tuple(sorted(self.params.items())))
+
+    def _query(self, sql: str) -> pd.DataFrame:
+        with sqlite3.connect(self.db_path) as con:
+            result = pd.read_sql_query(sql, con, params=self.params)
+        con.close()
+        return result
+
+
+def parse_arguments():
+    """
+    Function supporting parsing arguments of the ingest command.
+    """
+    parser = argparse.ArgumentParser(description="Load IMDb and geopolitical data into a SQLite store.")
+    parser.add_argument("--db", type=str, required=True, help="Path to the SQLite database file to create.")
+    add_data_arguments(parser, geo_required=False)
+    args = parser.parse_args()
+    return args
+
+def main():
+    """
+    Main function of the ingest command.
+    """
+    args = parse_arguments()
+    geo_paths = (args.pop, args.gdp, args.pc)
+    if any(path is None for path in geo_paths):
+        if any(path is not None for path in geo_paths):
+            raise ValueError('Either all or none of --pop, --gdp and --pc should be given.')
+        geo_paths = None
+    build_store(args.db, (args.basics, args.akas, args.ratings), geo_paths)
+
+if __name__ == "__main__":
+    main()
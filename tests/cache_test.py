@@ -0,0 +1,91 @@
+import os
+from io import StringIO
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from cinematic_impact_package.lib import IMDbData, strong_impact, movies_quality, load_data
+from cinematic_impact_package.cache import ResultCache
+
+def test_memoize_skips_ingest_and_computation(imdb_files, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    cached_strong_impact = cache.memoize(strong_impact)
+    expected = strong_impact(IMDbData(imdb_files, 'movie', (1990, 2011)), 'weighted_mean',
+                             data='averageRating', weight='numVotes')
+
+    first = cached_strong_impact(IMDbData(imdb_files, 'movie', (1990, 2011)), 'weighted_mean',
+                                 data='averageRating', weight='numVotes')
+    with patch('cinematic_impact_package.lib.load_data', side_effect=AssertionError) as mock_load_data, \
+         patch('cinematic_impact_package.lib._apply_measure', side_effect=AssertionError):
+        second = cached_strong_impact(IMDbData(imdb_files, 'movie', (1990, 2011)), 'weighted_mean',
+                                      data='averageRating', weight='numVotes')
+        mock_load_data.assert_not_called()
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+
+def test_key_depends_on_parameters_and_files(imdb_files, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    keys = {cache.make_key(strong_impact, {'dc': dc, 'qm': 'mean', 'kwargs': {'col': 'averageRating'}}),
+            cache.make_key(strong_impact, {'dc': dc, 'qm': 'mean', 'kwargs': {'col': 'numVotes'}}),
+            cache.make_key(strong_impact, {'dc': IMDbData(imdb_files, 'movie', (1990, 2012)),
+                                           'qm': 'mean', 'kwargs': {'col': 'numVotes'}})}
+    assert len(keys) == 3
+    assert dc.fingerprint() == IMDbData(imdb_files, 'movie', (1990, 2011)).fingerprint()
+
+    key = cache.make_key(strong_impact, {'dc': dc, 'qm': 'mean', 'kwargs': {'col': 'averageRating'}})
+    with open(imdb_files[2], 'a') as file:
+        file.write("tt009\t1.0\t1\n")
+    assert cache.make_key(strong_impact, {'dc': dc, 'qm': 'mean', 'kwargs': {'col': 'averageRating'}}) != key
+
+def test_key_depends_on_thresholds(imdb_files, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    cached_strong_impact = cache.memoize(strong_impact)
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    first = cached_strong_impact(dc, 'flop_prob', col='averageRating')
+    with patch('cinematic_impact_package.lib.FLOP_TH', 7.6):
+        second = cached_strong_impact(dc, 'flop_prob', col='averageRating')
+        pd.testing.assert_frame_equal(second, strong_impact(dc, 'flop_prob', col='averageRating'))
+    assert not first['flop_prob'].equals(second['flop_prob'])
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+def test_cache_hit_writes_output_path(imdb_files, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    cached_movies_quality = cache.memoize(movies_quality)
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    first = cached_movies_quality(dc, 2, 'sum_votes', 90, output_path=tmp_path / "first.csv", col='numVotes')
+    second = cached_movies_quality(dc, 2, 'sum_votes', 90, output_path=tmp_path / "second.csv", col='numVotes')
+    pd.testing.assert_frame_equal(first, second)
+    assert len(os.listdir(tmp_path / "cache")) == 1
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "second.csv"), pd.read_csv(tmp_path / "first.csv"))
+
+def test_cache_hit_writes_default_output(imdb_files, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("out")
+    cache = ResultCache(str(tmp_path / "cache"))
+    cached_movies_quality = cache.memoize(movies_quality)
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    first = cached_movies_quality(dc, 2, 'sum_votes', 90, col='numVotes')
+    path = tmp_path / "out" / "task1_repr_2_th_90_sum_votes.csv"
+    os.remove(path)
+    cached_movies_quality(dc, 2, 'sum_votes', 90, col='numVotes')
+    pd.testing.assert_frame_equal(pd.read_csv(path), first.reset_index(drop=True))
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    values = {key: pd.DataFrame({'x': np.random.default_rng(i).random(200)}) for i, key in enumerate('abcd')}
+    for key in 'abc':
+        cache.put(key, values[key])
+        os.utime(cache._path(key), ns=(0, ord(key) * 10**9))
+    cache.max_bytes = 3 * os.path.getsize(cache._path('a'))
+    assert cache.get('a') is not None
+    cache.put('d', values['d'])
+    assert sorted(name[0] for name in os.listdir(tmp_path / "cache")) == ['a', 'c', 'd']
+    assert cache.get('b') is None
+    pd.testing.assert_frame_equal(cache.get('d'), values['d'])
+
+def test_uncacheable_arguments_are_computed(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    cached_load_data = cache.memoize(load_data)
+    result = cached_load_data(StringIO("a\tb\n1\t2\n"))
+    pd.testing.assert_frame_equal(result, pd.DataFrame({'a': [1], 'b': [2]}))
+    assert os.listdir(tmp_path / "cache") == []
@@ -0,0 +1,32 @@
+import pytest
+import pandas as pd
+
+@pytest.fixture
+def imdb_files(tmp_path):
+    basics = pd.DataFrame({
+        'tconst': ['tt001', 'tt002', 'tt003', 'tt004', 'tt005', 'tt006', 'tt007', 'tt008'],
+        'titleType': ['movie', 'movie', 'short', 'tvMovie', 'movie', 'short', 'movie', 'movie'],
+        'primaryTitle': ['Movie1', 'Movie2', 'Short1', 'tv1', 'Film3', 'Short2', 'Film4', 'Film5'],
+        'startYear': ['2000', '2011', '2022', '1999', '2005', '2012', '\\N', '1995'],
+        'genres': ['Comedy,Romance,Drama', 'Action,Romance', 'Comedy', 'Drama', '\\N', 'Comedy', 'Drama', 'Drama,Comedy']
+    })
+    ratings = pd.DataFrame({
+        'tconst': ['tt001', 'tt002', 'tt003', 'tt004', 'tt005', 'tt006', 'tt007', 'tt008'],
+        'averageRating': [8.0, 7.5, 9.0, 6.0, 2.7, 5.0, 7.1, 2.5],
+        'numVotes': [100, 150, 50, 40, 320, 70, 10, 200]
+    })
+    akas = pd.DataFrame({
+        'titleId': ['tt001', 'tt001', 'tt001', 'tt001', 'tt002', 'tt002', 'tt002', 'tt003', 'tt003', 'tt004',
+                    'tt004', 'tt005', 'tt005', 'tt005', 'tt006', 'tt007', 'tt007', 'tt008', 'tt008', 'tt008',
+                    'tt002'],
+        'title': ['Movie1', 'Movie1', 'Movie1', 'Pelicula1', 'Movie2', 'Movie2', 'Pellicola2', 'Short1', 'Short1',
+                  'tv1', 'tv1', 'Film3', 'Film3', 'Film3', 'Short2', 'Film4', 'Film4', 'Film5', 'Film5', 'Film5',
+                  'Movie2'],
+        'region': ['\\N', 'US', 'GB', 'ES', '\\N', 'GB', 'IT', '\\N', 'IN', '\\N', 'DE', '\\N', 'PL', 'US', '\\N',
+                   '\\N', 'PL', '\\N', 'PL', 'GB', 'NA'],
+        'isOriginalTitle': [1, 0, 0, 0, 1, 0, 0, 1, 0, 1, 0, 1, 0, 0, 1, 1, 0, 1, 0, 0, 0]
+    })
+    paths = tuple(str(tmp_path / name) for name in ['basics.tsv', 'akas.tsv', 'ratings.tsv'])
+    for frame, path in zip([basics, akas, ratings], paths):
+        frame.to_csv(path, sep='\t', index=False)
+    return paths
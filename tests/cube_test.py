@@ -0,0 +1,54 @@
+import pytest
+import pandas as pd
+from cinematic_impact_package import lib
+from cinematic_impact_package.lib import IMDbData, region_statistics, region_genre_analysis, make_comparison
+from cinematic_impact_package.cube import AggregateCube
+
+@pytest.fixture
+def cube(imdb_files):
+    return AggregateCube.build(imdb_files)
+
+@pytest.mark.parametrize('by_genre', [False, True])
+@pytest.mark.parametrize('prod_type, in_years, decades', [('movie', (1990, 2019), [1990, 2000, 2010]),
+                                                          ('movie', (2000, 2009), [2000]),
+                                                          ('short', (1800, 2029), None)])
+def test_statistics(imdb_files, cube, by_genre, prod_type, in_years, decades):
+    expected = region_statistics(IMDbData(imdb_files, prod_type, in_years), by_genre)
+    if decades is None:
+        decades = list(range(1800, 2030, 10))
+    result = cube.statistics({'titleType': [prod_type], 'decade': decades}, by_genre=by_genre)
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_measure_matches_comparison(imdb_files, cube, tmp_path):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2019))
+    full = region_genre_analysis(dc, 'weighted_mean', output_path=tmp_path / "output.csv",
+                                 data='averageRating', weight='numVotes')
+    expected = make_comparison(full, {'Poland', 'United Kingdom'}, {'Drama', 'Romance'}, tmp_path / "comparison.csv")
+    result = cube.measure('weighted_mean', {'country': {'Poland', 'United Kingdom'}, 'genre': {'Drama', 'Romance'},
+                                           'titleType': ['movie'], 'decade': [1990, 2000, 2010]},
+                          by_genre=True, data='averageRating', weight='numVotes')
+    pd.testing.assert_frame_equal(result.sort_values(['country', 'genre']).reset_index(drop=True),
+                                  expected.sort_values(['country', 'genre']).reset_index(drop=True))
+
+def test_unknown_decade_and_types(cube):
+    result = cube.measure('sum_votes', {'country': {'Poland'}}, col='numVotes')
+    assert result['sum_votes'].tolist() == [530]
+    result = cube.measure('sum_votes', {'country': {'Poland'}, 'decade': [1990, 2000]}, col='numVotes')
+    assert result['sum_votes'].tolist() == [520]
+
+def test_save_load(cube, tmp_path):
+    path = tmp_path / "cube.npz"
+    cube.save(path)
+    loaded = AggregateCube.load(path)
+    pd.testing.assert_frame_equal(loaded.statistics(by_genre=True), cube.statistics(by_genre=True))
+
+def test_load_checks_thresholds(imdb_files, cube, tmp_path, monkeypatch):
+    path = tmp_path / "cube.npz"
+    cube.save(path)
+    monkeypatch.setattr(lib, 'FLOP_TH', lib.FLOP_TH + 1)
+    with pytest.raises(ValueError, match='thresholds'):
+        AggregateCube.load(path)
+    AggregateCube.build(imdb_files).save(path)
+    expected = region_statistics(IMDbData(imdb_files, 'short', (1800, 2029)))
+    result = AggregateCube.load(path).statistics({'titleType': ['short']})
+    pd.testing.assert_frame_equal(result, expected)
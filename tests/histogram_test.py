@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import pandas as pd
+from cinematic_impact_package.lib import IMDbData, region_statistics, strong_impact, region_genre_analysis
+from cinematic_impact_package.histogram import RatingHistogram
+
+@pytest.fixture
+def dc(imdb_files):
+    return IMDbData(imdb_files, 'movie', (1990, 2011))
+
+@pytest.fixture
+def merged(dc):
+    return pd.merge(dc.title_region_table(), dc.title_info_table(), on='tconst')
+
+@pytest.mark.parametrize('by_genre', [False, True])
+def test_statistics(dc, by_genre):
+    expected = region_statistics(dc, by_genre)
+    result = RatingHistogram.build(dc, by_genre).statistics()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+@pytest.mark.parametrize('qm', ['flop_prob', 'masterpiece_prob', 'two-sided'])
+def test_measure_default_thresholds(dc, qm, tmp_path):
+    hist = RatingHistogram.build(dc)
+    pd.testing.assert_frame_equal(hist.measure(qm, col='averageRating'), strong_impact(dc, qm, col='averageRating'))
+    expected = region_genre_analysis(dc, qm, output_path=tmp_path / "output.csv", col='averageRating')
+    result = RatingHistogram.build(dc, by_genre=True).measure(qm, col='averageRating')
+    pd.testing.assert_frame_equal(result.sort_values(['country', 'genre']).reset_index(drop=True),
+                                  expected.sort_values(['country', 'genre']).reset_index(drop=True))
+
+def test_measure_custom_thresholds(dc, merged):
+    result = RatingHistogram.build(dc).measure('two-sided', flop_th=7.5, masterpiece_th=7.05, col='averageRating')
+    ratings = merged[merged['region'] == 'PL']['averageRating']
+    expected = ((ratings > 7.05).sum() - (ratings < 7.5).sum()) / len(ratings)
+    assert result[result['country'] == 'Poland']['two-sided'].iloc[0] == pytest.approx(expected)
+
+@pytest.mark.parametrize('above', [False, True])
+@pytest.mark.parametrize('weighted', [False, True])
+def test_sweep(dc, merged, above, weighted):
+    thresholds = [1.0, 2.5, 2.7, 3.33, 7.1, 8.0, 10.0]
+    result = RatingHistogram.build(dc).sweep(thresholds, above=above, weighted=weighted)
+    for region, country in [('GB', 'United Kingdom'), ('PL', 'Poland'), ('US', 'United States')]:
+        titles = merged[merged['region'] == region]
+        weights = titles['numVotes'] if weighted else np.ones(len(titles))
+        for th in thresholds:
+            selected = titles['averageRating'] > th if above else titles['averageRating'] < th
+            expected = weights[selected].sum() / weights.sum()
+            assert result[result['country'] == country][th].iloc[0] == pytest.approx(expected)
+
+def test_quantiles(dc, merged):
+    qs = [0, 0.1, 0.25, 0.5, 0.9, 1]
+    hist = RatingHistogram.build(dc)
+    result = hist.quantiles(qs)
+    weighted = hist.quantiles(qs, weighted=True)
+    for region, country in [('GB', 'United Kingdom'), ('PL', 'Poland')]:
+        titles = merged[merged['region'] == region]
+        expected = np.quantile(titles['averageRating'], qs, method='inverted_cdf')
+        np.testing.assert_allclose(result[result['country'] == country][qs].iloc[0], expected)
+        repeated = np.repeat(titles['averageRating'], titles['numVotes'])
+        expected = np.quantile(repeated, qs, method='inverted_cdf')
+        np.testing.assert_allclose(weighted[weighted['country'] == country][qs].iloc[0], expected)
+    with pytest.raises(ValueError):
+        hist.quantiles([1.5])
+
+def test_save_load(dc, tmp_path):
+    hist = RatingHistogram.build(dc, by_genre=True)
+    path = tmp_path / "histogram.npz"
+    hist.save(path)
+    loaded = RatingHistogram.load(path)
+    pd.testing.assert_frame_equal(loaded.groups, hist.groups)
+    np.testing.assert_array_equal(loaded.counts, hist.counts)
+    np.testing.assert_array_equal(loaded.votes, hist.votes)
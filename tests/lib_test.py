@@ -1,11 +1,14 @@
 import pytest
+import csv
+import gzip
 import pandas as pd
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 from cinematic_impact_package.lib import QUALITY_MEASURES, IMDbData, create_representation, get_top_countries, \
                                         weak_impact, strong_impact, region_genre_analysis, make_comparison, \
                                             load_data, movies_quality, geopolitical_data, impact_vs_data,\
-                                                split_star_countries
+                                                split_star_countries, impact_vs_data_batch, code_to_country
 
 # Mock data for testing
 basics_data = pd.DataFrame({
@@ -32,7 +35,7 @@ akas_data = pd.DataFrame({
 def imdb_data_instance():
     with patch('cinematic_impact_package.lib.load_data') as mock_load_data:
         mock_load_data.side_effect = [basics_data, ratings_data, akas_data]
-        return IMDbData(('path/to/basics.tsv', 'path/to/akas.tsv', 'path/to/ratings.tsv'), 'movie', (1990, 2011))
+        yield IMDbData(('path/to/basics.tsv', 'path/to/akas.tsv', 'path/to/ratings.tsv'), 'movie', (1990, 2011))
 
 @pytest.mark.parametrize('qm, expected, col', [('sum_votes', 10, 'numVotes'), ('mean', 2.5, 'numVotes'), ('flop_prob', 0.5, 'numVotes'), ('masterpiece_prob', 0.0, 'numVotes'), ('two-sided', -0.5, 'numVotes')])
 def test_quality_measures_simple(qm, expected, col):
@@ -64,6 +67,149 @@ def test_load_data(mock_data):
     result_df = load_data(mock_data, delim='\t')
     pd.testing.assert_frame_equal(result_df, expected_df)
 
+@pytest.mark.parametrize('workers', [2, 3, 50])
+def test_load_data_parallel(imdb_files, workers):
+    usecols = ['titleId', 'region', 'isOriginalTitle']
+    expected = pd.read_csv(imdb_files[1], delimiter='\t', usecols=usecols, dtype={'isOriginalTitle': str},
+                           quoting=csv.QUOTE_NONE)
+    with patch('cinematic_impact_package.lib.PARALLEL_PARSE_MIN_BYTES', 0), \
+         patch('cinematic_impact_package.lib.pd.read_csv', wraps=pd.read_csv) as mock_read_csv:
+        result = load_data(imdb_files[1], usecols=usecols, dtype={'isOriginalTitle': str}, workers=workers,
+                           quoting=csv.QUOTE_NONE)
+        mock_read_csv.assert_not_called()
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_load_data_parallel_quotes(tmp_path):
+    path = tmp_path / "akas.tsv"
+    titles = [f'Title{i}' for i in range(40)]
+    titles[9], titles[30] = '"Weird', 'Odd"'
+    pd.DataFrame({'titleId': [f'tt{i:03}' for i in range(40)], 'title': titles}) \
+        .to_csv(path, sep='\t', index=False, quoting=csv.QUOTE_NONE, escapechar='\\')
+    with patch('cinematic_impact_package.lib.PARALLEL_PARSE_MIN_BYTES', 0):
+        serial = load_data(path, workers=1, quoting=csv.QUOTE_NONE)
+        assert serial['title'].tolist() == titles
+        pd.testing.assert_frame_equal(load_data(path, workers=4, quoting=csv.QUOTE_NONE), serial)
+        with patch('cinematic_impact_package.lib.ProcessPoolExecutor') as mock_executor:
+            quoted = load_data(path, workers=4)
+        mock_executor.assert_not_called()
+        pd.testing.assert_frame_equal(quoted, load_data(path, workers=1))
+        assert len(quoted) < len(serial)
+
+def test_load_data_sample(imdb_files):
+    full = load_data(imdb_files[1])
+    assert load_data(imdb_files[1], sample=(1.0, 0)).equals(full)
+    sampled = load_data(imdb_files[1], sample=(0.5, 3))
+    kept = set(sampled['titleId'])
+    assert 0 < len(kept) < full['titleId'].nunique()
+    pd.testing.assert_frame_equal(sampled.reset_index(drop=True),
+                                  full[full['titleId'].isin(kept)].reset_index(drop=True))
+    assert set(load_data(imdb_files[0], sample=(0.5, 3))['tconst']) == kept
+    assert set(load_data(imdb_files[1], sample=(0.5, 4))['titleId']) != kept
+
+def test_load_data_sample_compressed(imdb_files, tmp_path):
+    compressed = tmp_path / "akas.tsv.gz"
+    with open(imdb_files[1], 'rb') as source, gzip.open(compressed, 'wb') as target:
+        target.write(source.read())
+    pd.testing.assert_frame_equal(load_data(compressed, sample=(0.5, 3)), load_data(imdb_files[1], sample=(0.5, 3)))
+    with pytest.raises(ValueError):
+        load_data(tmp_path / "akas.tsv.zst", sample=(0.5, 3))
+
+@pytest.mark.parametrize('block_bytes', [1, 7, 64])
+def test_load_data_sample_blocks(imdb_files, tmp_path, block_bytes):
+    expected = load_data(imdb_files[1], sample=(0.5, 3))
+    with patch('cinematic_impact_package.sampling.SAMPLE_BLOCK_BYTES', block_bytes):
+        pd.testing.assert_frame_equal(load_data(imdb_files[1], sample=(0.5, 3)), expected)
+        unterminated = tmp_path / "akas.tsv"
+        with open(imdb_files[1], 'rb') as source:
+            unterminated.write_bytes(source.read().rstrip(b'\n'))
+        pd.testing.assert_frame_equal(load_data(unterminated, sample=(0.5, 3)), expected)
+
+def test_sampled_imdb_data(imdb_files, tmp_path):
+    full = IMDbData(imdb_files, 'movie', (1990, 2011))
+    whole_sample = IMDbData(imdb_files, 'movie', (1990, 2011), sample_fraction=1.0)
+    weak = weak_impact(whole_sample)
+    pd.testing.assert_frame_equal(weak[['country', 'sum_votes']], weak_impact(full).astype({'sum_votes': float}))
+    assert (weak['sum_votes_se'] == 0).all()
+
+    half = IMDbData(imdb_files, 'movie', (1990, 2011), sample_fraction=0.5, sample_seed=3)
+    kept = set(load_data(imdb_files[0], sample=(0.5, 3))['tconst'])
+    assert set(half.title_info_table()['tconst']) <= kept
+    assert set(half.title_region_table()['tconst']) <= kept
+
+    result = strong_impact(half, 'mean', col='averageRating')
+    merged = pd.merge(half.title_region_table(), half.title_info_table(), on='tconst')
+    ratings = merged[merged['region'] == 'GB']['averageRating']
+    row = result[result['country'] == 'United Kingdom'].iloc[0]
+    assert row['mean'] == pytest.approx(ratings.mean())
+    assert row['mean_se'] == pytest.approx((0.5 * ratings.var() / len(ratings)) ** 0.5, nan_ok=True)
+
+    weak = weak_impact(half)
+    votes = merged[merged['region'] == 'GB']['numVotes']
+    row = weak[weak['country'] == 'United Kingdom'].iloc[0]
+    assert row['sum_votes'] == votes.sum() / 0.5
+    assert row['sum_votes_se'] == pytest.approx((0.5 * (votes ** 2).sum()) ** 0.5 / 0.5)
+
+    result = region_genre_analysis(half, 'weighted_mean', output_path=tmp_path / "output.csv",
+                                   data='averageRating', weight='numVotes')
+    assert list(result.columns) == ['country', 'genre', 'weighted_mean', 'weighted_mean_se']
+
+    with pytest.raises(ValueError):
+        IMDbData(imdb_files, 'movie', (1990, 2011), sample_fraction=0)
+
+def test_lazy_imdb_data(imdb_files):
+    with patch('cinematic_impact_package.lib.load_data', wraps=load_data) as mock_load_data:
+        dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+        mock_load_data.assert_not_called()
+        create_representation(dc, repr_size=2, vote_treshold=None)
+        loaded = [(call.args[0], call.kwargs['usecols']) for call in mock_load_data.call_args_list]
+        assert loaded == [(imdb_files[0], ['tconst', 'titleType', 'startYear']),
+                          (imdb_files[2], ['tconst', 'numVotes', 'averageRating'])]
+
+        assert 'genres' in dc.title_info_table().columns
+        assert mock_load_data.call_args.kwargs['usecols'] == ['tconst', 'genres']
+        mock_load_data.reset_mock()
+        dc.prefetch().result()
+        mock_load_data.assert_called_once()
+        assert mock_load_data.call_args.args[0] == imdb_files[1]
+
+    full = IMDbData(imdb_files, 'movie', (1990, 2011))
+    full.prefetch()
+    pd.testing.assert_frame_equal(dc.title_region_table(), full.title_region_table())
+    pd.testing.assert_frame_equal(dc.title_info_table().sort_index(axis=1), full.title_info_table().sort_index(axis=1))
+
+def test_prefetch_columns(imdb_files):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    with patch('cinematic_impact_package.lib.load_data', wraps=load_data) as mock_load_data:
+        dc.prefetch(['tconst', 'genres']).result()
+        dc.title_info_table(['tconst', 'genres'])
+    assert [call.args[0] for call in mock_load_data.call_args_list] == [imdb_files[0], imdb_files[2], imdb_files[1]]
+
+def test_prefetch_failure(imdb_files, tmp_path):
+    dc = IMDbData((imdb_files[0], tmp_path / "missing.tsv", imdb_files[2]), 'movie', (1990, 2011))
+    with pytest.raises(FileNotFoundError):
+        dc.prefetch().result()
+    with patch('cinematic_impact_package.lib.load_data') as mock_load_data, pytest.raises(FileNotFoundError):
+        dc.title_region_table()
+    mock_load_data.assert_not_called()
+
+def test_concurrent_analyses_share_data(imdb_files, tmp_path):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    info, regions = dc.title_info_table().copy(), dc.title_region_table().copy()
+    analyses = [
+        lambda: create_representation(dc, repr_size=3, vote_treshold=None),
+        lambda: get_top_countries(dc, create_representation(dc, 3, None), 'mean', col='averageRating'),
+        lambda: weak_impact(dc),
+        lambda: strong_impact(dc, 'weighted_mean', data='averageRating', weight='numVotes'),
+        lambda: region_genre_analysis(dc, 'mean', output_path=tmp_path / "output.csv", col='averageRating')
+    ] * 4
+    expected = [analysis() for analysis in analyses]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda analysis: analysis(), analyses))
+    for result, expected_result in zip(results, expected):
+        pd.testing.assert_frame_equal(result, expected_result)
+    pd.testing.assert_frame_equal(dc.title_info_table(), info)
+    pd.testing.assert_frame_equal(dc.title_region_table(), regions)
+
 def test_title_info_table(imdb_data_instance):
     result = imdb_data_instance.title_info_table()
     basic_info_type = basics_data[basics_data['titleType'] == 'movie']
@@ -118,6 +264,19 @@ def test_strong_impact(imdb_data_instance):
     expected = pd.DataFrame({'country': ['United Kingdom', 'United States'], 'weighted_mean': [7.7, 8.0]})
     pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
 
+@pytest.mark.parametrize('qm, kwargs', [('sum_votes', {'col': 'numVotes'}), ('mean', {'col': 'averageRating'}),
+                                        ('weighted_mean', {'data': 'averageRating', 'weight': 'numVotes'}),
+                                        ('flop_prob', {'col': 'averageRating'}),
+                                        ('masterpiece_prob', {'col': 'averageRating'}),
+                                        ('two-sided', {'col': 'averageRating'})])
+def test_strong_impact_matches_quality_measures(imdb_files, qm, kwargs):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    merged = pd.merge(dc.title_region_table(), dc.title_info_table(), on='tconst')
+    applied = merged.groupby('region')[['numVotes', 'averageRating']].apply(QUALITY_MEASURES[qm], **kwargs)
+    result = strong_impact(dc, qm, **kwargs)
+    assert dict(zip(result['country'], result[qm])) == pytest.approx(
+        {code_to_country(region): value for region, value in applied.items()})
+
 @pytest.fixture
 def mock_country_data():
     data = {
@@ -205,6 +364,29 @@ def test_impact_vs_data(mock_impact_table, mock_geopolitical_data, tmp_path):
     loaded_df = pd.read_csv(output_path)
     pd.testing.assert_frame_equal(loaded_df.reset_index(drop=True), expected_sorted.reset_index(drop=True))
 
+def test_impact_vs_data_batch(mock_impact_table, mock_geopolitical_data, tmp_path):
+    strong_table = pd.DataFrame({'country': ['Canada', 'United States', 'Poland'], 'score': [7.5, 7.5, 9.0]})
+    result, correlations = impact_vs_data_batch({'weak': (mock_impact_table, 'impact_col'), 'strong': (strong_table, 'score')},
+                                                mock_geopolitical_data, output_path=tmp_path / "output.csv",
+                                                correlation_path=tmp_path / "correlations.csv")
+
+    for data_col in ['pop', 'gdp', 'pc']:
+        single_path = tmp_path / f"single_{data_col}.csv"
+        impact_vs_data(mock_impact_table, 'impact_col', mock_geopolitical_data, data_col, single_path)
+        single = pd.read_csv(single_path).sort_values('country').reset_index(drop=True)
+        batch = result[['country', 'weak_rank', f'{data_col}_rank', f'weak_vs_{data_col}']].sort_values('country')
+        batch.columns = single.columns
+        pd.testing.assert_frame_equal(batch.reset_index(drop=True), single)
+
+    by_country = result.set_index('country')
+    assert pd.isna(by_country.loc['United Kingdom', 'strong_rank'])
+    assert by_country.loc['Canada', 'strong_vs_pc'] == 0.0
+    pc_row = correlations[(correlations['impact'] == 'weak') & (correlations['data'] == 'pc')].iloc[0]
+    assert pc_row['n'] == 3
+    assert pc_row['spearman'] == pytest.approx(0.5)
+    assert pc_row['kendall'] == pytest.approx(1/3)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "correlations.csv"), correlations)
+
 
 def test_region_genre_analysis(imdb_data_instance, tmp_path):
     output_path = tmp_path / "output.csv"
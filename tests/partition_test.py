@@ -0,0 +1,56 @@
+import pytest
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from cinematic_impact_package.lib import IMDbData, STATISTICS, region_statistics, strong_impact, \
+                                        region_genre_analysis, read_csv_range
+from cinematic_impact_package.partition import Partitioner
+
+@pytest.mark.parametrize('by_genre', [False, True])
+@pytest.mark.parametrize('n_shards, memory_limit', [(1, None), (3, None), (2, 2000)])
+def test_partitioned_region_statistics(imdb_files, by_genre, n_shards, memory_limit):
+    expected = region_statistics(IMDbData(imdb_files, 'movie', (1990, 2011)), by_genre)
+    partitioner = Partitioner(n_shards=n_shards, memory_limit=memory_limit, max_workers=2)
+    result = partitioner.region_statistics(IMDbData(imdb_files, 'movie', (1990, 2011)), by_genre)
+    pd.testing.assert_frame_equal(result, expected)
+    assert list(result.columns[-len(STATISTICS):]) == STATISTICS
+
+def test_files_parsed_by_workers(imdb_files):
+    expected = region_statistics(IMDbData(imdb_files, 'movie', (1990, 2011)))
+    with patch('cinematic_impact_package.partition.pd.read_csv') as mock_read_csv, \
+         patch('cinematic_impact_package.lib.pd.read_csv') as mock_lib_read_csv:
+        result = Partitioner(n_shards=2, max_workers=2).region_statistics(IMDbData(imdb_files, 'movie', (1990, 2011)))
+    mock_read_csv.assert_not_called()
+    mock_lib_read_csv.assert_not_called()
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.parametrize('by_genre', [False, True])
+def test_genres_read_only_by_genre(imdb_files, by_genre):
+    with patch('cinematic_impact_package.partition.spawn_process_pool', ThreadPoolExecutor), \
+         patch('cinematic_impact_package.partition.read_csv_range', wraps=read_csv_range) as mock_read_csv_range:
+        Partitioner(n_shards=1, max_workers=1).region_statistics(IMDbData(imdb_files, 'movie', (1990, 2011)), by_genre)
+    path, _, read_kwargs = mock_read_csv_range.call_args_list[0].args
+    assert path == imdb_files[0]
+    assert ('genres' in read_kwargs['usecols']) == by_genre
+
+@pytest.mark.parametrize('qm, kwargs', [('sum_votes', {'col': 'numVotes'}), ('flop_prob', {'col': 'averageRating'}),
+                                        ('weighted_mean', {'data': 'averageRating', 'weight': 'numVotes'})])
+def test_partitioned_impact(imdb_files, qm, kwargs, tmp_path):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    partitioner = Partitioner(n_shards=3, max_workers=2)
+    expected = strong_impact(dc, qm, **kwargs)
+    result = partitioner.impact(IMDbData(imdb_files, 'movie', (1990, 2011)), qm, **kwargs)
+    pd.testing.assert_frame_equal(result, expected)
+
+    expected = region_genre_analysis(dc, qm, output_path=tmp_path / "output.csv", **kwargs)
+    result = partitioner.impact(IMDbData(imdb_files, 'movie', (1990, 2011)), qm, by_genre=True, **kwargs)
+    pd.testing.assert_frame_equal(result.sort_values(['country', 'genre']).reset_index(drop=True),
+                                  expected.sort_values(['country', 'genre']).reset_index(drop=True))
+
+def test_partitioned_impact_unsupported(imdb_files):
+    partitioner = Partitioner(n_shards=1, max_workers=1)
+    with pytest.raises(ValueError):
+        partitioner.impact(IMDbData(imdb_files, 'movie', (1990, 2011)), 'mean', col='title')
+    with pytest.raises(ValueError):
+        partitioner.impact(IMDbData(imdb_files, 'movie', (1990, 2011), sample_fraction=0.5), 'sum_votes',
+                           col='numVotes')
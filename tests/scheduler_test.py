@@ -0,0 +1,63 @@
+import time
+import pytest
+from cinematic_impact_package.scheduler import TaskGraph
+
+def _sleep(secs):
+    time.sleep(secs)
+    return secs
+
+def test_run_shares_results():
+    calls = []
+
+    def source():
+        calls.append('source')
+        return 2
+
+    graph = TaskGraph()
+    graph.add('source', source)
+    graph.add('double', lambda x: 2 * x, ('source',))
+    graph.add('power', lambda x, exp: x ** exp, ('source',), exp=3)
+    graph.add('total', lambda x, y: x + y, ('double', 'power'))
+    results = graph.run(max_workers=2)
+    assert results == {'source': 2, 'double': 4, 'power': 8, 'total': 12}
+    assert calls == ['source']
+
+def test_run_independent_stages_concurrently():
+    graph = TaskGraph()
+    for i in range(4):
+        graph.add(f'sleep_{i}', _sleep, (), secs=0.2)
+    start = time.perf_counter()
+    graph.run(max_workers=4)
+    assert time.perf_counter() - start < 0.6
+
+def test_critical_path():
+    graph = TaskGraph()
+    graph.add('ingest', _sleep, (), secs=0.05)
+    graph.add('short', lambda _: None, ('ingest',))
+    graph.add('long', lambda _: time.sleep(0.1), ('ingest',))
+    graph.add('report', lambda a, b: None, ('short', 'long'))
+    graph.run()
+    path, duration = graph.critical_path()
+    assert path == ['ingest', 'long', 'report']
+    assert duration >= 0.15
+
+def test_critical_path_before_run():
+    graph = TaskGraph()
+    graph.add('a', lambda: 1)
+    with pytest.raises(ValueError):
+        graph.critical_path()
+
+def test_invalid_graph():
+    graph = TaskGraph()
+    graph.add('a', lambda x: x, ('b',))
+    graph.add('b', lambda x: x, ('a',))
+    with pytest.raises(ValueError):
+        graph.run()
+
+    graph = TaskGraph()
+    graph.add('a', lambda x: x, ('missing',))
+    with pytest.raises(ValueError):
+        graph.run()
+
+    with pytest.raises(ValueError):
+        graph.add('a', lambda: 1)
@@ -0,0 +1,64 @@
+import sqlite3
+import pytest
+import pandas as pd
+from cinematic_impact_package.lib import IMDbData, weak_impact, strong_impact, region_genre_analysis, \
+                                        region_statistics
+from cinematic_impact_package.sqlstore import build_store, SQLiteIMDbData
+
+@pytest.fixture
+def store(imdb_files, tmp_path):
+    geo_paths = []
+    for name in ['pop', 'gdp', 'pc']:
+        path = tmp_path / f"{name}.csv"
+        path.write_text("Country Code,2000,2010\nUSA,1,2\nGBR,3,\nPOL,4,5\n")
+        geo_paths.append(str(path))
+    db_path = str(tmp_path / "imdb.db")
+    build_store(db_path, imdb_files, tuple(geo_paths))
+    return db_path
+
+def test_indexes(store):
+    with sqlite3.connect(store) as con:
+        indexes = {row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        plan = ' '.join(str(row) for row in con.execute(
+            "EXPLAIN QUERY PLAN SELECT tconst FROM basics WHERE titleType = 'movie' AND startYear BETWEEN 1 AND 2"))
+    con.close()
+    assert {'basics_tconst', 'basics_type_year', 'ratings_tconst', 'title_region_tconst', 'title_region_region'} <= indexes
+    assert 'basics_type_year' in plan
+
+def test_rebuild(imdb_files, store):
+    build_store(store, imdb_files)
+    with sqlite3.connect(store) as con:
+        count = con.execute("SELECT COUNT(*) FROM basics").fetchone()[0]
+        geo_count = con.execute("SELECT COUNT(*) FROM geopolitical").fetchone()[0]
+    con.close()
+    assert count == 8
+    assert geo_count == 0
+
+def test_tables(imdb_files, store):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    sql_dc = SQLiteIMDbData(store, 'movie', (1990, 2011))
+    columns = ['tconst', 'startYear', 'numVotes', 'averageRating']
+    pd.testing.assert_frame_equal(sql_dc.title_info_table()[columns].sort_values('tconst').reset_index(drop=True),
+                                  dc.title_info_table()[columns].astype({'startYear': str}).sort_values('tconst')
+                                  .reset_index(drop=True))
+    pd.testing.assert_frame_equal(sql_dc.title_region_table().sort_values(['tconst', 'region']).reset_index(drop=True),
+                                  dc.title_region_table().sort_values(['tconst', 'region']).reset_index(drop=True))
+    assert sql_dc.geopolitical_table()['country'].tolist() == ['United States', 'United Kingdom', 'Poland']
+
+@pytest.mark.parametrize('by_genre', [False, True])
+def test_region_statistics(imdb_files, store, by_genre):
+    expected = region_statistics(IMDbData(imdb_files, 'movie', (1990, 2011)), by_genre)
+    result = region_statistics(SQLiteIMDbData(store, 'movie', (1990, 2011)), by_genre)
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.parametrize('qm, kwargs', [('weighted_mean', {'data': 'averageRating', 'weight': 'numVotes'}),
+                                        ('two-sided', {'col': 'averageRating'})])
+def test_pushdown_analyses(imdb_files, store, qm, kwargs, tmp_path):
+    dc = IMDbData(imdb_files, 'movie', (1990, 2011))
+    sql_dc = SQLiteIMDbData(store, 'movie', (1990, 2011))
+    pd.testing.assert_frame_equal(weak_impact(sql_dc), weak_impact(dc))
+    pd.testing.assert_frame_equal(strong_impact(sql_dc, qm, **kwargs), strong_impact(dc, qm, **kwargs))
+    result = region_genre_analysis(sql_dc, qm, output_path=tmp_path / "sql.csv", **kwargs)
+    expected = region_genre_analysis(dc, qm, output_path=tmp_path / "pandas.csv", **kwargs)
+    pd.testing.assert_frame_equal(result.sort_values(['country', 'genre']).reset_index(drop=True),
+                                  expected.sort_values(['country', 'genre']).reset_index(drop=True))